@@ -4,18 +4,111 @@ Adaptif Öğrenme Sistemi - AI'nın kullanıcı etkileşimlerinden öğrenmesini
 """
 
 import json
+import re
 import sqlite3
-import pandas as pd
+import atexit
+import threading
+import time
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import logging
-from dataclasses import dataclass, asdict
-from collections import defaultdict, Counter
-import pickle
+import itertools
+from dataclasses import dataclass, asdict, field
+from collections import defaultdict, Counter, deque, ChainMap
 import hashlib
 
-@dataclass
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    TFIDF_AVAILABLE = True
+except ImportError:
+    TFIDF_AVAILABLE = False
+    logging.warning("scikit-learn bulunamadı - pattern araması doğrusal taramaya düşecek")
+
+# interactions tablosu / yazma tamponu satır düzeni
+_INTERACTION_COLUMNS = [
+    'user_id', 'query', 'intent', 'confidence', 'response_type', 'user_feedback',
+    'response_time', 'timestamp', 'session_id', 'context'
+]
+
+# Zaman damgaları unix epoch INTEGER olarak saklanır (ISO metin yerine 8 bayt)
+sqlite3.register_adapter(datetime, lambda d: int(d.timestamp()))
+sqlite3.register_converter("TIMESTAMP", lambda b: datetime.fromtimestamp(int(b)))
+
+# Sorgu normalizasyonu için önceden derlenmiş regex'ler
+_RE_PUNCT = re.compile(r'[^\w\s]')
+_RE_DIGITS = re.compile(r'\d+')
+_RE_WS = re.compile(r'\s+')
+
+
+def _normalize_query(query: str) -> str:
+    """Sorguyu normalize eder"""
+    
+    # Küçük harfe çevir
+    normalized = query.lower()
+    
+    # Noktalama işaretlerini kaldır
+    normalized = _RE_PUNCT.sub('', normalized)
+    
+    # Ekstra boşlukları temizle
+    normalized = _RE_WS.sub(' ', normalized).strip()
+    
+    # Sayıları genelleştir
+    return _RE_DIGITS.sub('NUM', normalized)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _pattern_id(tag: str, text: str) -> str:
+    """
+    Pattern için kısa (8 hex) ve deterministik bir ID üretir.
+    ID'ler veritabanında saklandığı için kurulu paketlere göre değişmemeli; hep aynı hash (md5'in ilk 8 hex'i,
+    eski kayıtlarla uyumlu) kullanılır.
+    """
+    return f"{tag}_{hashlib.md5(text.encode(), usedforsecurity=False).hexdigest()[:8]}"
+
+
+def _hash_shingles(text: str) -> np.ndarray:
+    """Metnin karakter 3-gram hash'lerini sıralı ve tekil int64 dizisi olarak döndürür"""
+    return np.unique(np.fromiter(map(hash, zip(text, text[1:], text[2:])), dtype=np.int64))
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _jaccard_sorted(a, b):
+        """Sıralı iki hash dizisi arasındaki Jaccard benzerliği (iki işaretçi kesişimi)"""
+        i = 0
+        j = 0
+        inter = 0
+        while i < a.size and j < b.size:
+            if a[i] == b[j]:
+                inter += 1
+                i += 1
+                j += 1
+            elif a[i] < b[j]:
+                i += 1
+            else:
+                j += 1
+        union = a.size + b.size - inter
+        return inter / union if union > 0 else 0.0
+else:
+    def _jaccard_sorted(a, b):
+        """Sıralı iki hash dizisi arasındaki Jaccard benzerliği"""
+        inter = np.intersect1d(a, b, assume_unique=True).size
+        union = a.size + b.size - inter
+        return inter / union if union > 0 else 0.0
+
+@dataclass(slots=True)
 class UserInteraction:
     """Kullanıcı etkileşim verisi"""
     user_id: str
@@ -25,11 +118,16 @@ class UserInteraction:
     response_type: str
     user_feedback: Optional[str] = None
     response_time: float = 0.0
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = field(default_factory=datetime.now)
     session_id: str = ""
-    context: Dict = None
+    context: Dict = field(default=None)
+    normalized: str = field(default='', init=False)
+    
+    def __post_init__(self):
+        # Normalize sorgu bir kez hesaplanır, öğrenme ve feedback yollarında tekrar kullanılır
+        self.normalized = _normalize_query(self.query)
 
-@dataclass
+@dataclass(slots=True)
 class LearningPattern:
     """Öğrenilen pattern"""
     pattern_id: str
@@ -39,21 +137,55 @@ class LearningPattern:
     success_rate: float
     last_updated: datetime
     confidence: float
+    normalized_query: str = ''
+    
+    def __post_init__(self):
+        # Benzerlik döngülerinde pattern_data sözlük erişimini önler
+        if not self.normalized_query:
+            self.normalized_query = self.pattern_data.get('normalized_query', '')
 
 class AdaptiveLearningSystem:
     """Adaptif öğrenme ve iyileştirme sistemi"""
     
-    def __init__(self, db_path: str = "learning_data.db"):
+    def __init__(self, db_path: str = "learning_data.db", flush_size: int = 500,
+                 flush_interval: float = 5.0, max_history: int = 10000):
         self.db_path = db_path
-        self.interaction_history = []
-        self.learned_patterns = {}
-        self.user_preferences = defaultdict(dict)
+        # Hafızadaki geçmiş sınırlı; rapor pencereleri SQL'den hesaplanır
+        self.interaction_history = deque(maxlen=max_history)
+        self._patterns_by_type: Dict[str, Dict[str, LearningPattern]] = defaultdict(dict)
+        self.user_preferences = defaultdict(lambda: defaultdict(Counter))
+        self._top_intent: Dict[str, str] = {}  # kullanıcı başına en sık intent (önbellek)
         self.query_improvements = {}
         self.context_memory = {}
         
+        # Yazma tamponu - etkileşimler toplu halde (executemany) yazılır
+        self._pending: List[tuple] = []
+        self._dirty_patterns: set = set()
+        self._dirty_users: set = set()
+        self._metrics_cursor = 0  # _pending içinde metriklere işlenmiş satır sayısı
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._db_lock = threading.Lock()
+        
+        # Kalıcı bağlantı (autocommit, transaction'lar elle yönetilir)
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        
+        # Query pattern benzerlik indeksi (TF-IDF, tembel yeniden kurulur)
+        self._vectorizer = None
+        self._pattern_matrix = None
+        self._pattern_ids: List[str] = []
+        self._unindexed_patterns: set = set()
+        self.index_rebuild_threshold = 50
+        self._pattern_shingles: Dict[str, np.ndarray] = {}
+        
         # Veritabanını başlat
         self._init_database()
         
+        # Kapanışta bekleyen kayıtları yaz
+        atexit.register(self._flush)
+        
         # Performans metrikleri
         self.performance_metrics = {
             'total_queries': 0,
@@ -73,10 +205,22 @@ class AdaptiveLearningSystem:
             'feedback_weight': 2.0
         }
     
+    @property
+    def learned_patterns(self) -> ChainMap:
+        """Tüm pattern tiplerinin salt-okunur birleşik görünümü"""
+        return ChainMap(*self._patterns_by_type.values())
+    
     def _init_database(self):
         """Öğrenme veritabanını başlatır"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            
+            # WAL modu: okuyucular yazıcıyı bloklamaz, commit başına fsync azalır
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA mmap_size=268435456")
+            cursor.execute("PRAGMA cache_size=-65536")
+            cursor.execute("PRAGMA temp_store=MEMORY")
             
             # Etkileşim tablosu
             cursor.execute('''
@@ -89,7 +233,7 @@ class AdaptiveLearningSystem:
                     response_type TEXT,
                     user_feedback TEXT,
                     response_time REAL,
-                    timestamp DATETIME,
+                    timestamp TIMESTAMP,
                     session_id TEXT,
                     context TEXT
                 )
@@ -103,7 +247,7 @@ class AdaptiveLearningSystem:
                     pattern_data TEXT,
                     frequency INTEGER,
                     success_rate REAL,
-                    last_updated DATETIME,
+                    last_updated TIMESTAMP,
                     confidence REAL
                 )
             ''')
@@ -115,12 +259,36 @@ class AdaptiveLearningSystem:
                     preference_type TEXT,
                     preference_data TEXT,
                     weight REAL,
-                    updated_at DATETIME,
+                    updated_at TIMESTAMP,
                     PRIMARY KEY (user_id, preference_type)
                 )
             ''')
             
-            conn.commit()
+            # İndeksler: feedback güncellemesi ve rapor sorguları tam tablo taramasın
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_interactions_user_ts
+                ON interactions(user_id, timestamp DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_interactions_ts
+                ON interactions(timestamp)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_interactions_query
+                ON interactions(query)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_patterns_type
+                ON learned_patterns(pattern_type)
+            ''')
+            
+            # Eski ISO metin zaman damgalarını epoch'a çevir (metin değerler
+            # tüm sayılardan sonra sıralandığı için aralık indeksle bulunur)
+            cursor.execute('''
+                UPDATE interactions
+                SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                WHERE timestamp >= ''
+            ''')
     
     def record_interaction(self, interaction: UserInteraction):
         """Kullanıcı etkileşimini kaydet"""
@@ -128,50 +296,104 @@ class AdaptiveLearningSystem:
         # Hafızada tut
         self.interaction_history.append(interaction)
         
-        # Veritabanına kaydet
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO interactions 
-                (user_id, query, intent, confidence, response_type, user_feedback, 
-                 response_time, timestamp, session_id, context)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                interaction.user_id, interaction.query, interaction.intent,
-                interaction.confidence, interaction.response_type, 
-                interaction.user_feedback, interaction.response_time,
-                interaction.timestamp, interaction.session_id,
-                json.dumps(interaction.context) if interaction.context else None
-            ))
-            conn.commit()
-        
-        # Performans metriklerini güncelle
-        self._update_performance_metrics(interaction)
+        # Yazma tamponuna ekle, eşik aşılınca toplu yaz
+        self._pending.append(self._interaction_row(interaction))
+        if (len(self._pending) >= self.flush_size or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self._flush()
         
         # Pattern öğrenmeyi tetikle
         self._trigger_pattern_learning(interaction)
     
-    def _update_performance_metrics(self, interaction: UserInteraction):
-        """Performans metriklerini günceller"""
+    def record_interactions_batch(self, interactions: List[UserInteraction]):
+        """Birden çok etkileşimi kaydet ve tek transaction (executemany) ile yaz"""
+        
+        self.interaction_history.extend(interactions)
+        self._pending.extend(map(self._interaction_row, interactions))
+        
+        for interaction in interactions:
+            self._trigger_pattern_learning(interaction)
+        
+        self._flush()
+    
+    @staticmethod
+    def _interaction_row(interaction: UserInteraction) -> tuple:
+        """Etkileşimi interactions tablosu satırına çevir"""
+        return (
+            interaction.user_id, interaction.query, interaction.intent,
+            interaction.confidence, interaction.response_type, 
+            interaction.user_feedback, interaction.response_time,
+            interaction.timestamp, interaction.session_id,
+            json.dumps(interaction.context) if interaction.context else None
+        )
+    
+    def _flush(self):
+        """Bekleyen etkileşimleri, değişen pattern ve tercihleri tek transaction içinde yazar"""
+        self._update_performance_metrics()
+        
+        with self._db_lock:
+            self._last_flush = time.monotonic()
+            if not self._pending and not self._dirty_patterns and not self._dirty_users:
+                return
+            
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                if self._pending:
+                    cursor.executemany('''
+                        INSERT INTO interactions 
+                        (user_id, query, intent, confidence, response_type, user_feedback, 
+                         response_time, timestamp, session_id, context)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', self._pending)
+                self._flush_patterns(cursor)
+                self._flush_user_preferences(cursor)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            
+            self._pending.clear()
+            self._metrics_cursor = 0
+            self._dirty_patterns.clear()
+            self._dirty_users.clear()
+    
+    def _update_performance_metrics(self):
+        """Tamponda henüz işlenmemiş etkileşimlerle performans metriklerini toplu günceller"""
+        
+        rows = self._pending[self._metrics_cursor:]
+        if not rows:
+            return
+        self._metrics_cursor = len(self._pending)
+        
+        # pandas yalnızca ilk toplu güncellemede yüklenir (import maliyeti yüksek)
+        import pandas as pd
         
-        self.performance_metrics['total_queries'] += 1
+        df = pd.DataFrame(rows, columns=_INTERACTION_COLUMNS)
+        metrics = self.performance_metrics
+        
+        old_avg = metrics['response_time_avg']
+        metrics['total_queries'] += len(df)
         
         # Başarılı yanıt kontrolü
-        if (interaction.confidence > 0.7 and 
-            interaction.user_feedback in [None, 'positive', 'helpful']):
-            self.performance_metrics['successful_responses'] += 1
+        success = (df['confidence'] > 0.7) & (
+            df['user_feedback'].isna() | df['user_feedback'].isin(['positive', 'helpful'])
+        )
+        metrics['successful_responses'] += int(success.sum())
         
         # Intent dağılımı
-        self.performance_metrics['common_intents'][interaction.intent] += 1
+        metrics['common_intents'].update(df['intent'].value_counts().to_dict())
         
-        # Yanıt süresi ortalaması
-        total_time = self.performance_metrics['response_time_avg'] * (self.performance_metrics['total_queries'] - 1)
-        self.performance_metrics['response_time_avg'] = (total_time + interaction.response_time) / self.performance_metrics['total_queries']
+        # Yanıt süresi ortalaması - artımlı (Welford/Chan) güncelleme:
+        # avg += (batch_mean - avg) * n_batch / n_total, toplam*ortalama çarpımı yok
+        batch_mean = float(df['response_time'].mean())
+        metrics['response_time_avg'] = old_avg + (batch_mean - old_avg) * len(df) / metrics['total_queries']
         
         # Hata pattern'ları
-        if interaction.confidence < 0.5 or interaction.user_feedback == 'negative':
-            error_signature = f"{interaction.intent}:{interaction.response_type}"
-            self.performance_metrics['error_patterns'][error_signature] += 1
+        errors = df[(df['confidence'] < 0.5) | (df['user_feedback'] == 'negative')]
+        if not errors.empty:
+            signatures = errors['intent'] + ':' + errors['response_type']
+            metrics['error_patterns'].update(signatures.value_counts().to_dict())
     
     def _trigger_pattern_learning(self, interaction: UserInteraction):
         """Pattern öğrenmeyi tetikler"""
@@ -192,14 +414,15 @@ class AdaptiveLearningSystem:
         """Sorgu pattern'larını öğrenir"""
         
         # Sorguyu normalize et
-        normalized_query = self._normalize_query(interaction.query)
+        normalized_query = interaction.normalized
         
         # Pattern ID oluştur
-        pattern_id = f"query_{hashlib.md5(normalized_query.encode()).hexdigest()[:8]}"
+        pattern_id = _pattern_id("query", normalized_query)
         
         # Mevcut pattern'ı güncelle veya yeni oluştur
-        if pattern_id in self.learned_patterns:
-            pattern = self.learned_patterns[pattern_id]
+        query_patterns = self._patterns_by_type['query_pattern']
+        if pattern_id in query_patterns:
+            pattern = query_patterns[pattern_id]
             pattern.frequency += 1
             
             # Başarı oranını güncelle
@@ -225,10 +448,12 @@ class AdaptiveLearningSystem:
                 last_updated=datetime.now(),
                 confidence=interaction.confidence
             )
-            self.learned_patterns[pattern_id] = pattern
+            query_patterns[pattern_id] = pattern
+            self._unindexed_patterns.add(pattern_id)
+            self._pattern_shingles[normalized_query] = _hash_shingles(normalized_query)
         
-        # Veritabanına kaydet
-        self._save_pattern_to_db(pattern)
+        # Toplu yazım için işaretle
+        self._dirty_patterns.add(pattern_id)
     
     def _learn_context_pattern(self, interaction: UserInteraction):
         """Context pattern'larını öğrenir"""
@@ -239,10 +464,12 @@ class AdaptiveLearningSystem:
         # Context signature oluştur
         context_keys = sorted(interaction.context.keys())
         context_signature = "_".join(context_keys)
-        pattern_id = f"context_{hashlib.md5(context_signature.encode()).hexdigest()[:8]}"
+        pattern_id = _pattern_id("context", context_signature)
         
-        if pattern_id in self.learned_patterns:
-            self.learned_patterns[pattern_id].frequency += 1
+        context_patterns = self._patterns_by_type['context_pattern']
+        if pattern_id in context_patterns:
+            context_patterns[pattern_id].frequency += 1
+            self._dirty_patterns.add(pattern_id)
         else:
             pattern = LearningPattern(
                 pattern_id=pattern_id,
@@ -257,8 +484,8 @@ class AdaptiveLearningSystem:
                 last_updated=datetime.now(),
                 confidence=interaction.confidence
             )
-            self.learned_patterns[pattern_id] = pattern
-            self._save_pattern_to_db(pattern)
+            context_patterns[pattern_id] = pattern
+            self._dirty_patterns.add(pattern_id)
     
     def _learn_user_preference(self, interaction: UserInteraction):
         """Kullanıcı tercihlerini öğrenir"""
@@ -267,18 +494,19 @@ class AdaptiveLearningSystem:
         
         # Intent tercihi
         if interaction.confidence > 0.8:
-            intent_prefs = self.user_preferences[user_id].get('intent_preferences', Counter())
+            intent_prefs = self.user_preferences[user_id]['intent_preferences']
             intent_prefs[interaction.intent] += 1
-            self.user_preferences[user_id]['intent_preferences'] = intent_prefs
+            self._dirty_users.add(user_id)
+            
+            # Sayaçlar yalnızca artar: en sık intent'i O(1) güncel tut
+            top = self._top_intent.get(user_id)
+            if top is None or intent_prefs[interaction.intent] > intent_prefs[top]:
+                self._top_intent[user_id] = interaction.intent
         
         # Response type tercihi
         if interaction.user_feedback == 'positive':
-            response_prefs = self.user_preferences[user_id].get('response_preferences', Counter())
-            response_prefs[interaction.response_type] += 1
-            self.user_preferences[user_id]['response_preferences'] = response_prefs
-        
-        # Veritabanına kaydet
-        self._save_user_preferences(user_id)
+            self.user_preferences[user_id]['response_preferences'][interaction.response_type] += 1
+            self._dirty_users.add(user_id)
     
     def _learn_intent_improvement(self, interaction: UserInteraction):
         """Intent tanıma iyileştirmelerini öğrenir"""
@@ -302,51 +530,40 @@ class AdaptiveLearningSystem:
     
     def _normalize_query(self, query: str) -> str:
         """Sorguyu normalize eder"""
-        import re
-        
-        # Küçük harfe çevir
-        normalized = query.lower()
-        
-        # Noktalama işaretlerini kaldır
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        
-        # Ekstra boşlukları temizle
-        normalized = ' '.join(normalized.split())
-        
-        # Sayıları genelleştir
-        normalized = re.sub(r'\d+', 'NUM', normalized)
+        return _normalize_query(query)
+    
+    def _flush_patterns(self, cursor: sqlite3.Cursor):
+        """Değişen pattern'ları tek executemany ile yazar (transaction çağırana ait)"""
+        if not self._dirty_patterns:
+            return
         
-        return normalized
+        rows = [
+            (p.pattern_id, p.pattern_type, json.dumps(p.pattern_data),
+             p.frequency, p.success_rate, p.last_updated, p.confidence)
+            for p in map(self.learned_patterns.__getitem__, self._dirty_patterns)
+        ]
+        cursor.executemany('''
+            INSERT OR REPLACE INTO learned_patterns 
+            (pattern_id, pattern_type, pattern_data, frequency, success_rate, last_updated, confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
     
-    def _save_pattern_to_db(self, pattern: LearningPattern):
-        """Pattern'ı veritabanına kaydeder"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO learned_patterns 
-                (pattern_id, pattern_type, pattern_data, frequency, success_rate, last_updated, confidence)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                pattern.pattern_id, pattern.pattern_type, json.dumps(pattern.pattern_data),
-                pattern.frequency, pattern.success_rate, pattern.last_updated, pattern.confidence
-            ))
-            conn.commit()
-    
-    def _save_user_preferences(self, user_id: str):
-        """Kullanıcı tercihlerini veritabanına kaydeder"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            for pref_type, pref_data in self.user_preferences[user_id].items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO user_preferences 
-                    (user_id, preference_type, preference_data, weight, updated_at)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    user_id, pref_type, json.dumps(dict(pref_data) if isinstance(pref_data, Counter) else pref_data),
-                    1.0, datetime.now()
-                ))
-            conn.commit()
+    def _flush_user_preferences(self, cursor: sqlite3.Cursor):
+        """Değişen kullanıcı tercihlerini tek executemany ile yazar (transaction çağırana ait)"""
+        if not self._dirty_users:
+            return
+        
+        now = datetime.now()
+        rows = [
+            (user_id, pref_type, json.dumps(dict(pref_data)), 1.0, now)
+            for user_id in self._dirty_users
+            for pref_type, pref_data in self.user_preferences[user_id].items()
+        ]
+        cursor.executemany('''
+            INSERT OR REPLACE INTO user_preferences 
+            (user_id, preference_type, preference_data, weight, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
     
     def get_intent_suggestions(self, query: str, user_id: str = None) -> Dict:
         """Query için intent önerileri döndürür"""
@@ -360,54 +577,113 @@ class AdaptiveLearningSystem:
         }
         
         # Learned pattern'larda ara
-        best_match = None
-        best_similarity = 0.0
-        
-        for pattern in self.learned_patterns.values():
-            if pattern.pattern_type == 'query_pattern':
-                similarity = self._calculate_similarity(
-                    normalized_query, 
-                    pattern.pattern_data['normalized_query']
-                )
-                
-                if similarity > best_similarity and similarity > 0.7:
-                    best_similarity = similarity
-                    best_match = pattern
+        best_match = self._find_best_query_pattern(normalized_query, threshold=0.7)
         
         if best_match:
             suggestions['primary_intent'] = best_match.pattern_data['best_intent']
             suggestions['confidence_boost'] = best_match.success_rate * 0.2
         
         # Kullanıcı tercihlerini kontrol et
-        if user_id and user_id in self.user_preferences:
-            intent_prefs = self.user_preferences[user_id].get('intent_preferences', Counter())
-            if intent_prefs:
-                most_preferred = intent_prefs.most_common(1)[0]
-                suggestions['user_preference_bonus'] = 0.1
-                
-                if not suggestions['primary_intent']:
-                    suggestions['primary_intent'] = most_preferred[0]
+        most_preferred = self._top_intent.get(user_id) if user_id else None
+        if most_preferred:
+            suggestions['user_preference_bonus'] = 0.1
+            
+            if not suggestions['primary_intent']:
+                suggestions['primary_intent'] = most_preferred
         
         return suggestions
     
+    def _rebuild_pattern_index(self):
+        """Query pattern'ları için TF-IDF matrisini yeniden kurar"""
+        query_patterns = self._patterns_by_type['query_pattern']
+        self._pattern_ids = list(query_patterns)
+        self._unindexed_patterns.clear()
+        self._pattern_matrix = None
+        
+        if not self._pattern_ids:
+            return
+        
+        self._vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 5))
+        try:
+            self._pattern_matrix = self._vectorizer.fit_transform([
+                query_patterns[pid].normalized_query
+                for pid in self._pattern_ids
+            ])
+        except ValueError:
+            # Boş vocabulary (çok kısa sorgular) - doğrusal taramaya düş
+            self._unindexed_patterns.update(self._pattern_ids)
+            self._pattern_ids = []
+    
+    def _find_best_query_pattern(self, normalized_query: str, threshold: float) -> Optional[LearningPattern]:
+        """Eşiği aşan en benzer query pattern'ı döndürür"""
+        best_match = None
+        best_similarity = threshold
+        query_patterns = self._patterns_by_type['query_pattern']
+        
+        if TFIDF_AVAILABLE:
+            if self._unindexed_patterns and (
+                    self._pattern_matrix is None or
+                    len(self._unindexed_patterns) > self.index_rebuild_threshold):
+                self._rebuild_pattern_index()
+            
+            # İndekslenmiş pattern'lar: tek sparse matris çarpımı (satırlar L2 normalize)
+            if self._pattern_matrix is not None:
+                query_vec = self._vectorizer.transform([normalized_query])
+                scores = (self._pattern_matrix @ query_vec.T).toarray().ravel()
+                idx = int(scores.argmax())
+                if scores[idx] > best_similarity:
+                    best_similarity = float(scores[idx])
+                    best_match = query_patterns[self._pattern_ids[idx]]
+            
+            # Son yeniden kurulumdan beri eklenenler doğrusal taranır
+            candidates = [query_patterns[pid] for pid in self._unindexed_patterns]
+        else:
+            candidates = query_patterns.values()
+        
+        query_grams = _hash_shingles(normalized_query)
+        for pattern in candidates:
+            similarity = self._shingle_similarity(
+                normalized_query, query_grams,
+                pattern.normalized_query
+            )
+            if similarity > best_similarity:
+                best_similarity = similarity
+                best_match = pattern
+        
+        return best_match
+    
     def _calculate_similarity(self, query1: str, query2: str) -> float:
-        """İki sorgu arasındaki benzerliği hesaplar"""
-        from difflib import SequenceMatcher
-        return SequenceMatcher(None, query1, query2).ratio()
+        """İki sorgu arasındaki benzerliği hesaplar (karakter 3-gram Jaccard)"""
+        return self._shingle_similarity(query1, _hash_shingles(query1), query2)
+    
+    def _shingle_similarity(self, query: str, query_grams: np.ndarray, pattern_query: str) -> float:
+        """Önceden hesaplanmış sorgu 3-gram'ları ile pattern sorgusu arasındaki Jaccard benzerliği"""
+        pattern_grams = self._pattern_shingles.get(pattern_query)
+        if pattern_grams is None:
+            pattern_grams = _hash_shingles(pattern_query)
+        
+        # 3 karakterden kısa sorgularda 3-gram yok
+        if not query_grams.size or not pattern_grams.size:
+            return 1.0 if query == pattern_query else 0.0
+        
+        return float(_jaccard_sorted(query_grams, pattern_grams))
     
     def get_performance_report(self) -> Dict:
         """Performans raporu oluşturur"""
         
+        # Tamponda bekleyen etkileşimleri yaz (metrikler de güncellenir)
+        self._flush()
+        
         # Son 30 günün verilerini al
         cutoff_date = datetime.now() - timedelta(days=30)
-        recent_interactions = [
-            i for i in self.interaction_history 
-            if i.timestamp > cutoff_date
-        ]
+        with self._db_lock:
+            recent_count = self._conn.execute(
+                "SELECT COUNT(*) FROM interactions WHERE timestamp > ?", (cutoff_date,)
+            ).fetchone()[0]
         
         report = {
             'summary': {
-                'total_queries': len(recent_interactions),
+                'total_queries': recent_count,
                 'success_rate': self.performance_metrics['successful_responses'] / max(self.performance_metrics['total_queries'], 1),
                 'avg_response_time': self.performance_metrics['response_time_avg'],
                 'learned_patterns': len(self.learned_patterns)
@@ -423,23 +699,33 @@ class AdaptiveLearningSystem:
     def _calculate_learning_progress(self) -> Dict:
         """Öğrenme ilerlemesini hesaplar"""
         
-        if not self.interaction_history:
-            return {'trend': 'no_data', 'improvement': 0.0}
+        self._flush()
         
         # Son 10 gün vs önceki 10 gün karşılaştırması
         now = datetime.now()
         recent_period = now - timedelta(days=10)
         older_period = now - timedelta(days=20)
         
-        recent_interactions = [i for i in self.interaction_history if i.timestamp > recent_period]
-        older_interactions = [i for i in self.interaction_history 
-                             if older_period < i.timestamp <= recent_period]
+        # Tek indeksli aralık taraması ile iki pencerenin ortalaması
+        with self._db_lock:
+            recent_avg, recent_count, older_avg, older_count = self._conn.execute('''
+                SELECT
+                    AVG(CASE WHEN timestamp > ? THEN confidence END),
+                    COUNT(CASE WHEN timestamp > ? THEN 1 END),
+                    AVG(CASE WHEN timestamp <= ? THEN confidence END),
+                    COUNT(CASE WHEN timestamp <= ? THEN 1 END)
+                FROM interactions
+                WHERE timestamp > ?
+            ''', (recent_period, recent_period, recent_period, recent_period, older_period)).fetchone()
+        
+        if not recent_count and not older_count:
+            return {'trend': 'no_data', 'improvement': 0.0}
         
-        if not older_interactions:
+        if not older_count:
             return {'trend': 'insufficient_data', 'improvement': 0.0}
         
-        recent_avg_confidence = np.mean([i.confidence for i in recent_interactions]) if recent_interactions else 0
-        older_avg_confidence = np.mean([i.confidence for i in older_interactions])
+        recent_avg_confidence = recent_avg if recent_count else 0
+        older_avg_confidence = older_avg
         
         improvement = recent_avg_confidence - older_avg_confidence
         
@@ -469,10 +755,10 @@ class AdaptiveLearningSystem:
             recommendations.append(f"{len(low_confidence_patterns)} pattern düşük başarı oranına sahip - eğitim verisi güncellenmeli")
         
         # Kullanıcı feedback'i
-        negative_feedback_count = len([
-            i for i in self.interaction_history[-100:] 
+        negative_feedback_count = sum(
+            1 for i in itertools.islice(reversed(self.interaction_history), 100)
             if i.user_feedback == 'negative'
-        ])
+        )
         
         if negative_feedback_count > 10:
             recommendations.append(f"Son 100 etkileşimde {negative_feedback_count} negatif feedback - kullanıcı deneyimi iyileştirmesi gerekli")
@@ -485,28 +771,47 @@ class AdaptiveLearningSystem:
     
     def export_learning_data(self, filename: str):
         """Öğrenme verilerini export eder"""
+        self._update_performance_metrics()
+        metrics = {
+            k: dict(v) if isinstance(v, Counter) else v
+            for k, v in self.performance_metrics.items()
+        }
         export_data = {
-            'performance_metrics': self.performance_metrics,
+            'performance_metrics': metrics,
             'learned_patterns': {k: asdict(v) for k, v in self.learned_patterns.items()},
             'user_preferences': dict(self.user_preferences),
             'query_improvements': self.query_improvements,
             'export_timestamp': datetime.now().isoformat()
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False, default=str)
+        if ORJSON_AVAILABLE:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(
+                    export_data, default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                ))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(export_data, f, indent=2, ensure_ascii=False, default=str)
         
         logging.info(f"Öğrenme verileri {filename} dosyasına export edildi")
     
     def import_learning_data(self, filename: str):
         """Öğrenme verilerini import eder"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
+            if ORJSON_AVAILABLE:
+                with open(filename, 'rb') as f:
+                    import_data = orjson.loads(f.read())
+            else:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    import_data = json.load(f)
             
-            # Performance metrikleri
+            # Performance metrikleri (sayaçlar Counter olarak geri yüklenir)
             if 'performance_metrics' in import_data:
-                self.performance_metrics.update(import_data['performance_metrics'])
+                for key, value in import_data['performance_metrics'].items():
+                    if isinstance(self.performance_metrics.get(key), Counter):
+                        value = Counter(value)
+                    self.performance_metrics[key] = value
             
             # Learned patterns
             if 'learned_patterns' in import_data:
@@ -515,12 +820,20 @@ class AdaptiveLearningSystem:
                     if 'last_updated' in pattern_data:
                         pattern_data['last_updated'] = datetime.fromisoformat(pattern_data['last_updated'])
                     
-                    self.learned_patterns[pattern_id] = LearningPattern(**pattern_data)
+                    pattern = LearningPattern(**pattern_data)
+                    self._patterns_by_type[pattern.pattern_type][pattern_id] = pattern
+                    if pattern.pattern_type == 'query_pattern':
+                        self._unindexed_patterns.add(pattern_id)
             
             # User preferences
             if 'user_preferences' in import_data:
                 for user_id, prefs in import_data['user_preferences'].items():
-                    self.user_preferences[user_id] = prefs
+                    self.user_preferences[user_id] = defaultdict(
+                        Counter, {pref_type: Counter(data) for pref_type, data in prefs.items()}
+                    )
+                    top = self.user_preferences[user_id]['intent_preferences'].most_common(1)
+                    if top:
+                        self._top_intent[user_id] = top[0][0]
             
             logging.info(f"Öğrenme verileri {filename} dosyasından import edildi")
             
@@ -541,6 +854,33 @@ class QueryOptimizer:
             'context_hints': {},
             'disambiguation_rules': {}
         }
+        
+        # Yaygın yazım hataları (manuel olarak tanımlanmış)
+        self._spell_map = {
+            'maas': 'maaş',
+            'magas': 'mağaza',
+            'calisan': 'çalışan',
+            'satis': 'satış',
+            'departman': 'departman',
+            'hesapla': 'hesapla',
+            'goster': 'göster',
+            'kac': 'kaç'
+        }
+        # Tüm anahtarlar tek alternation regex'inde (uzun anahtar önce)
+        self._spell_re = re.compile(
+            '|'.join(map(re.escape, sorted(self._spell_map, key=len, reverse=True))),
+            re.IGNORECASE
+        )
+        
+        # Sinonim haritası
+        self._synonyms = {
+            'göster': ['listele', 'getir', 'ver'],
+            'hesapla': ['bul', 'çıkar', 'belirle'],
+            'karşılaştır': ['kıyasla', 'mukayese et'],
+            'çalışan': ['personel', 'kişi', 'employee'],
+            'maaş': ['ücret', 'salary'],
+            'mağaza': ['şube', 'store']
+        }
     
     def optimize_query(self, query: str, user_id: str = None, context: Dict = None) -> Dict:
         """Sorguyu optimize eder"""
@@ -587,43 +927,28 @@ class QueryOptimizer:
     
     def _apply_spelling_corrections(self, query: str) -> Tuple[str, List[str]]:
         """Yazım hatalarını düzeltir"""
-        corrections_applied = []
-        corrected_query = query
+        applied = {}
         
-        # Yaygın yazım hataları (manuel olarak tanımlanmış)
-        spelling_corrections = {
-            'maas': 'maaş',
-            'magas': 'mağaza',
-            'calisan': 'çalışan',
-            'satis': 'satış',
-            'departman': 'departman',
-            'hesapla': 'hesapla',
-            'goster': 'göster',
-            'kac': 'kaç'
-        }
+        def _fix(match):
+            wrong = match.group(0).lower()
+            # IGNORECASE eşleşmesinin .lower() hali anahtar olmayabilir (ör. 'CALİSAN' -> 'cali̇san', 'maaſ')
+            correct = self._spell_map.get(wrong)
+            if correct is None:
+                return match.group(0)
+            applied[wrong] = f"spelling_correction: {wrong} -> {correct}"
+            return correct
         
-        for wrong, correct in spelling_corrections.items():
-            if wrong in query.lower():
-                corrected_query = corrected_query.replace(wrong, correct)
-                corrections_applied.append(f"spelling_correction: {wrong} -> {correct}")
+        # Tek geçişte tüm düzeltmeler
+        corrected_query = self._spell_re.sub(_fix, query)
         
-        return corrected_query, corrections_applied
+        return corrected_query, list(applied.values())
     
     def _apply_synonym_expansion(self, query: str) -> Tuple[str, List[str]]:
         """Sinonim genişletmesi yapar"""
         synonyms_used = []
         expanded_query = query
         
-        # Sinonim haritası
-        synonyms = {
-            'göster': ['listele', 'getir', 'ver'],
-            'hesapla': ['bul', 'çıkar', 'belirle'],
-            'karşılaştır': ['kıyasla', 'mukayese et'],
-            'çalışan': ['personel', 'kişi', 'employee'],
-            'maaş': ['ücret', 'salary'],
-            'mağaza': ['şube', 'store']
-        }
-        
+        # Sinonim haritası: self._synonyms
         # Context'e göre sinonim ekleme mantığı burada implementasyonu geliştirilecek
         
         return expanded_query, synonyms_used
@@ -649,14 +974,11 @@ class QueryOptimizer:
         disambiguated_query = query
         
         # Kullanıcı geçmişine göre belirsizlik giderme
-        if user_id and user_id in self.learning_system.user_preferences:
-            user_prefs = self.learning_system.user_preferences[user_id]
-            
+        if user_id:
             # En sık kullanılan intent'e göre öncelik ver
-            if 'intent_preferences' in user_prefs:
-                top_intent = user_prefs['intent_preferences'].most_common(1)
-                if top_intent:
-                    disambiguations.append(f"user_preference: likely_{top_intent[0][0]}")
+            top_intent = self.learning_system._top_intent.get(user_id)
+            if top_intent:
+                disambiguations.append(f"user_preference: likely_{top_intent}")
         
         return disambiguated_query, disambiguations
     
@@ -667,15 +989,15 @@ class QueryOptimizer:
         # Öğrenilen pattern'lara göre öneriler
         similar_patterns = []
         normalized_query = self.learning_system._normalize_query(query)
+        query_grams = _hash_shingles(normalized_query)
         
-        for pattern in self.learning_system.learned_patterns.values():
-            if pattern.pattern_type == 'query_pattern':
-                similarity = self.learning_system._calculate_similarity(
-                    normalized_query, 
-                    pattern.pattern_data['normalized_query']
-                )
-                if 0.3 < similarity < 0.7:  # Benzer ama aynı olmayan
-                    similar_patterns.append((pattern, similarity))
+        for pattern in self.learning_system._patterns_by_type['query_pattern'].values():
+            similarity = self.learning_system._shingle_similarity(
+                normalized_query, query_grams,
+                pattern.normalized_query
+            )
+            if 0.3 < similarity < 0.7:  # Benzer ama aynı olmayan
+                similar_patterns.append((pattern, similarity))
         
         # En yüksek benzerlik skoruna göre sırala
         similar_patterns.sort(key=lambda x: x[1], reverse=True)
@@ -716,23 +1038,21 @@ class LearningIntegration:
         """Kullanıcı feedback'ini sisteme ekler"""
         
         # Son etkileşimi bul ve feedback ekle
+        target = learning_system._normalize_query(query_signature)
         for interaction in reversed(learning_system.interaction_history):
-            if (interaction.user_id == user_id and 
-                learning_system._normalize_query(interaction.query) == 
-                learning_system._normalize_query(query_signature)):
+            if interaction.user_id == user_id and interaction.normalized == target:
                 
                 interaction.user_feedback = feedback
                 
-                # Veritabanını güncelle
-                with sqlite3.connect(learning_system.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
+                # Bekleyen kayıtları yaz, sonra veritabanını güncelle
+                learning_system._flush()
+                with learning_system._db_lock:
+                    learning_system._conn.execute('''
                         UPDATE interactions 
                         SET user_feedback = ?
                         WHERE user_id = ? AND query = ?
                         ORDER BY timestamp DESC LIMIT 1
                     ''', (feedback, user_id, interaction.query))
-                    conn.commit()
                 
                 break
 
@@ -756,18 +1076,21 @@ def test_adaptive_learning():
         ("user2", "ortalama maaş", "mathematical_calculation", 0.85, "calculation_result"),
     ]
     
-    # Etkileşimleri kaydet
-    for user_id, query, intent, confidence, response_type in test_interactions:
-        interaction = UserInteraction(
+    # Etkileşimleri tek seferde kaydet
+    response_times = np.random.uniform(0.5, 3.0, size=len(test_interactions))
+    learning_system.record_interactions_batch([
+        UserInteraction(
             user_id=user_id,
             query=query,
             intent=intent,
             confidence=confidence,
             response_type=response_type,
-            response_time=np.random.uniform(0.5, 3.0),
+            response_time=float(response_time),
             user_feedback='positive' if confidence > 0.75 else None
         )
-        learning_system.record_interaction(interaction)
+        for (user_id, query, intent, confidence, response_type), response_time
+        in zip(test_interactions, response_times)
+    ])
     
     print("✅ Test etkileşimleri kaydedildi")
     
@@ -7,81 +7,297 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Tuple
 import logging
+import warnings
 from datetime import datetime, timedelta
+from collections import OrderedDict, namedtuple
 import json
+import os
+import re
+from contextlib import nullcontext
 
 # İsteğe bağlı kütüphaneler
+# scikit-learn ilk segmentasyonda yüklenir (bkz. AdvancedAnalyticsEngine._lazy_import);
+# None = henüz denenmedi
+ADVANCED_STATS_AVAILABLE = None
+
+try:
+    from joblib import Parallel, delayed
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
 try:
-    from scipy import stats
-    from sklearn.preprocessing import StandardScaler
-    from sklearn.cluster import KMeans
-    from sklearn.linear_model import LinearRegression
-    ADVANCED_STATS_AVAILABLE = True
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
 except ImportError:
-    ADVANCED_STATS_AVAILABLE = False
-    logging.warning("İleri istatistik kütüphaneleri yok, temel analiz kullanılacak")
+    THREADPOOLCTL_AVAILABLE = False
+
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+try:
+    import polars as pl
+    _HAS_POLARS = True
+except ImportError:
+    _HAS_POLARS = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Sütun adı anahtar kelimeleri: tek regex ile tek geçişte sınıflandırma
+_CLASSIFY_RE = re.compile(
+    r'(?P<ciro>ciro)|(?P<store>mağaza|store)|(?P<sales>satış|sales|revenue)'
+    r'|(?P<salary>maaş|salary)|(?P<dept>departman)|(?P<employee>çalışan|employee)'
+    r'|(?P<growth>büyüme|growth)',
+    re.IGNORECASE
+)
+
+def _classify_columns(col_lower_map: Dict[Any, str]) -> Dict[str, List]:
+    """Sütunları ad anahtar kelimelerine göre tek geçişte sınıflandır"""
+    columns = {key: [] for key in ('ciro_cols', 'growth_cols', 'store_cols', 'salary_cols',
+                                   'dept_cols', 'sales_cols', 'hr_cols')}
+    for col, col_lower in col_lower_map.items():
+        found = {m.lastgroup for m in _CLASSIFY_RE.finditer(col_lower)}
+        if not found:
+            continue
+        for name in found & {'ciro', 'growth', 'store', 'salary', 'dept'}:
+            columns[f'{name}_cols'].append(col)
+        if found & {'ciro', 'store', 'sales'}:
+            columns['sales_cols'].append(col)
+        if found & {'salary', 'dept', 'employee'}:
+            columns['hr_cols'].append(col)
+    
+    return columns
+
+# Bir analiz boyunca paylaşılan, DataFrame başına bir kez hesaplanan bağlam
+_Ctx = namedtuple('_Ctx', ['df', 'num_df', 'num_cols', 'num_arr', 'cat_cols', 'col_lower_map', 'groups',
+                           'missing_pct'])
+
+# Bellekte tutulan en fazla analiz sonucu (LRU)
+ANALYSIS_CACHE_SIZE = 32
+
+# Bu satır sayısının üzerinde segmentasyon MiniBatchKMeans ile yapılır
+MINIBATCH_MIN_ROWS = 10_000
+
+# Bu sayıdan fazla sayısal sütun varsa aykırı değer taraması thread'lere dağıtılır
+PARALLEL_MIN_COLUMNS = 16
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _select_quantile(x, q):
+        """Kısmi sıralama ile doğrusal interpolasyonlu quantile (np.quantile ile aynı)"""
+        h = (x.size - 1) * q
+        lo = int(np.floor(h))
+        t = h - lo
+        part = np.partition(x, lo)
+        a = part[lo]
+        if t == 0.0 or lo + 1 >= x.size:
+            return a
+        b = part[lo + 1:].min()
+        diff = b - a
+        return b - diff * (1.0 - t) if t >= 0.5 else a + diff * t
+    
+    @njit(cache=True)
+    def _outlier_kernel(arr):
+        """IQR aykırı değer sayısı ve sınırları: (count, lower, upper)"""
+        # NaN'ları ön ayrılmış tampona atlayarak filtrele
+        scratch = np.empty(arr.size, dtype=np.float64)
+        n = 0
+        for i in range(arr.size):
+            if not np.isnan(arr[i]):
+                scratch[n] = arr[i]
+                n += 1
+        if n == 0:
+            return 0, np.nan, np.nan
+        x = scratch[:n]
+        q1 = _select_quantile(x, 0.25)
+        q3 = _select_quantile(x, 0.75)
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        count = 0
+        for i in range(n):
+            if x[i] < lower or x[i] > upper:
+                count += 1
+        return count, lower, upper
+else:
+    def _outlier_kernel(arr):
+        """IQR aykırı değer sayısı ve sınırları: (count, lower, upper)"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            q1, q3 = np.nanquantile(arr, [0.25, 0.75])
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        return int(np.count_nonzero((arr < lower) | (arr > upper))), lower, upper
+
+def _per_col_outliers(col, arr: np.ndarray, n_rows: int) -> Tuple[Any, Dict]:
+    """Tek sütun için IQR aykırı değer raporu (ham ndarray üzerinde, GIL'i numpy bırakır)"""
+    count, lower, upper = _outlier_kernel(np.ascontiguousarray(arr, dtype=np.float64))
+    count = int(count)
+    # İlk 5 değer için maske yalnızca aykırı değer varsa oluşturulur
+    first_5 = arr[(arr < lower) | (arr > upper)][:5].tolist() if count else []
+    return col, {
+        'count': count,
+        'percentage': count / n_rows * 100,
+        'first_5_values': first_5,
+        'lower': float(lower),
+        'upper': float(upper)
+    }
 
 class AdvancedAnalyticsEngine:
     """İleri düzey analiz motoru"""
     
+    # İlk segmentasyonda yüklenen scikit-learn sınıfları (tüm örneklerce paylaşılır)
+    _sklearn_imputer = None
+    _sklearn_scaler = None
+    _sklearn_kmeans = None
+    _sklearn_minibatch_kmeans = None
+    
+    @classmethod
+    def _lazy_import(cls) -> bool:
+        """scikit-learn'ü ilk kullanımda yükle; kullanılabilir mi döndür"""
+        global ADVANCED_STATS_AVAILABLE
+        if ADVANCED_STATS_AVAILABLE is None:
+            try:
+                from sklearn.preprocessing import StandardScaler
+                from sklearn.cluster import KMeans, MiniBatchKMeans
+                from sklearn.impute import SimpleImputer
+                cls._sklearn_imputer = SimpleImputer
+                cls._sklearn_scaler = StandardScaler
+                cls._sklearn_kmeans = KMeans
+                cls._sklearn_minibatch_kmeans = MiniBatchKMeans
+                ADVANCED_STATS_AVAILABLE = True
+            except ImportError:
+                ADVANCED_STATS_AVAILABLE = False
+                logging.warning("İleri istatistik kütüphaneleri yok, temel analiz kullanılacak")
+        return ADVANCED_STATS_AVAILABLE
+    
     def __init__(self):
-        self.analysis_cache = {}
+        self.analysis_cache = OrderedDict()
         self.insights_history = []
+        self._outlier_cache = {}
+        
+    def _analysis_key(self, df: pd.DataFrame, filename: str):
+        """(dosya adı, içerik hash'i) önbellek anahtarı; hash'lenemeyen içerikte None"""
+        try:
+            content_hash = hash(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+        except TypeError:
+            return None
+        return (filename, hash((content_hash, tuple(map(str, df.columns)))))
+        
+    def _build_context(self, df: pd.DataFrame) -> _Ctx:
+        """Sayısal/kategorik ayrımı ve sütun sınıflarını bir kez hesapla"""
+        num_df = df.select_dtypes(include=[np.number])
+        num_arr = num_df.to_numpy(dtype=np.float64, na_value=np.nan, copy=False)
+        cat_cols = df.select_dtypes(exclude=[np.number]).columns
+        col_lower_map = {col: str(col).lower() for col in df.columns}
+        
+        # Eksik hücreler: sayısal blokta doğrudan tampon üzerinden, diğerlerinde sütun sütun
+        missing = int(np.count_nonzero(np.isnan(num_arr))) + sum(int(df[col].isna().sum()) for col in cat_cols)
+        cells = len(df) * len(df.columns)
+        
+        return _Ctx(
+            df=df,
+            num_df=num_df,
+            num_cols=num_df.columns,
+            num_arr=num_arr,
+            cat_cols=cat_cols,
+            col_lower_map=col_lower_map,
+            groups=_classify_columns(col_lower_map),
+            missing_pct=missing / cells * 100 if cells else 0.0
+        )
         
     def comprehensive_analysis(self, df: pd.DataFrame, filename: str) -> Dict:
         """Kapsamlı veri analizi"""
         
+        # Aynı dosya aynı içerikle tekrar analiz edilirse önbellekten dön
+        key = self._analysis_key(df, filename)
+        if key is not None and key in self.analysis_cache:
+            self.analysis_cache.move_to_end(key)
+            return self.analysis_cache[key]
+        
+        # Aykırı değer hesapları bu çağrı içinde sütun başına bir kez yapılır
+        self._outlier_cache.clear()
+        
+        ctx = self._build_context(df)
+        
+        # Ciro toplamları trend ve tahmin analizlerince ortak kullanılır (numpy skaler,
+        # sıfıra bölme istisna yerine inf/NaN verir)
+        ciro_sums = {col: df[col].sum() for col in ctx.groups['ciro_cols']}
+        
         analysis = {
             'filename': filename,
             'timestamp': datetime.now().isoformat(),
-            'basic_stats': self._calculate_basic_stats(df),
-            'business_insights': self._generate_business_insights(df),
-            'anomaly_detection': self._detect_anomalies(df),
-            'correlation_analysis': self._analyze_correlations(df),
-            'trend_analysis': self._analyze_trends(df),
-            'segmentation': self._perform_segmentation(df),
-            'forecasting': self._generate_forecasts(df),
+            'basic_stats': self._calculate_basic_stats(ctx),
+            'business_insights': self._generate_business_insights(ctx),
+            'anomaly_detection': self._detect_anomalies(ctx),
+            'correlation_analysis': self._analyze_correlations(ctx),
+            'trend_analysis': self._analyze_trends(ctx, ciro_sums),
+            'segmentation': self._perform_segmentation(ctx),
+            'forecasting': self._generate_forecasts(ctx, ciro_sums),
             'recommendations': []
         }
         
         # Önerileri oluştur
         analysis['recommendations'] = self._generate_recommendations(analysis)
         
+        self._outlier_cache.clear()
+        
+        if key is not None:
+            # HTTP önbelleği için içerikten türetilen ETag
+            analysis['etag'] = f"{key[1] & 0xFFFFFFFFFFFFFFFF:016x}"
+            self.analysis_cache[key] = analysis
+            if len(self.analysis_cache) > ANALYSIS_CACHE_SIZE:
+                self.analysis_cache.popitem(last=False)
+        
         return analysis
     
-    def _calculate_basic_stats(self, df: pd.DataFrame) -> Dict:
+    def _calculate_basic_stats(self, ctx: _Ctx) -> Dict:
         """Temel istatistikler"""
         
+        df = ctx.df
         stats = {
-            'total_rows': int(len(df)),
-            'total_columns': int(len(df.columns)),
-            'missing_data_percentage': float((df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100),
+            'total_rows': len(df),
+            'total_columns': len(df.columns),
+            'missing_data_percentage': ctx.missing_pct,
             'numeric_columns': [],
             'categorical_columns': [],
             'data_quality_score': 0.0
         }
         
-        # Sütun tiplerini analiz et
-        for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                col_stats = {
-                    'column': str(col),
-                    'mean': float(df[col].mean()) if not df[col].empty else 0.0,
-                    'median': float(df[col].median()) if not df[col].empty else 0.0,
-                    'std': float(df[col].std()) if not df[col].empty else 0.0,
-                    'min': float(df[col].min()) if not df[col].empty else 0.0,
-                    'max': float(df[col].max()) if not df[col].empty else 0.0,
-                    'outlier_count': int(self._count_outliers(df[col]))
-                }
-                stats['numeric_columns'].append(col_stats)
-            else:
-                col_stats = {
-                    'column': str(col),
-                    'unique_count': int(df[col].nunique()),
-                    'most_frequent': str(df[col].mode().iloc[0]) if not df[col].empty else '',
-                    'frequency': int(df[col].value_counts().iloc[0]) if not df[col].empty else 0
-                }
-                stats['categorical_columns'].append(col_stats)
+        num_df = ctx.num_df
+        
+        # Sayısal sütunlar: tüm istatistikler tek geçişte (std popülasyon, ddof=0)
+        outlier_report = self._compute_outlier_report(ctx)
+        if not len(num_df.columns):
+            num_stats = {}
+        elif _HAS_POLARS:
+            num_stats = self._polars_numeric_stats(num_df)
+        else:
+            num_stats = self._buffer_numeric_stats(ctx)
+        for col, col_agg in num_stats.items():
+            col_stats = {'column': str(col)}
+            for stat in ('mean', 'median', 'std', 'min', 'max'):
+                col_stats[stat] = float(np.nan_to_num(col_agg[stat]))
+            col_stats['outlier_count'] = outlier_report[col]['count']
+            stats['numeric_columns'].append(col_stats)
+        
+        # Kategorik sütunlar: tek value_counts ile benzersiz sayı, en sık değer ve frekans
+        for col in ctx.cat_cols:
+            counts = df[col].value_counts(dropna=True)
+            stats['categorical_columns'].append({
+                'column': str(col),
+                'unique_count': len(counts),
+                'most_frequent': str(counts.index[0]) if len(counts) else '',
+                'frequency': int(counts.iloc[0]) if len(counts) else 0
+            })
         
         # Veri kalitesi skoru
         missing_penalty = stats['missing_data_percentage'] / 100
@@ -90,64 +306,135 @@ class AdvancedAnalyticsEngine:
         
         return stats
     
-    def _count_outliers(self, series: pd.Series) -> int:
-        """Aykırı değer sayısını hesapla (IQR yöntemi)"""
-        if len(series) < 4 or not pd.api.types.is_numeric_dtype(series):
-            return 0
-        
-        Q1 = series.quantile(0.25)
-        Q3 = series.quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        
-        outliers = series[(series < lower_bound) | (series > upper_bound)]
-        return len(outliers)
+    def _polars_numeric_stats(self, num_df: pd.DataFrame) -> Dict[Any, Dict[str, float]]:
+        """Sayısal istatistikleri Polars lazy planında tek geçişte hesapla"""
+        names = [str(col) for col in num_df.columns]
+        lazy = pl.from_pandas(num_df.set_axis(names, axis=1), include_index=False).lazy()
+        row = lazy.select([
+            pl.all().mean().name.suffix('__mean'),
+            pl.all().median().name.suffix('__median'),
+            pl.all().std(ddof=0).name.suffix('__std'),
+            pl.all().min().name.suffix('__min'),
+            pl.all().max().name.suffix('__max')
+        ]).collect().row(0, named=True)
+        
+        return {
+            # Tamamen boş sütunlarda Polars None döndürür, pandas ile aynı şekilde NaN'a çevir
+            col: {stat: np.nan if row[f'{name}__{stat}'] is None else row[f'{name}__{stat}']
+                  for stat in ('mean', 'median', 'std', 'min', 'max')}
+            for col, name in zip(num_df.columns, names)
+        }
+    
+    def _buffer_numeric_stats(self, ctx: _Ctx) -> Dict[Any, Dict[str, float]]:
+        """Sayısal istatistikleri float64 tampon üzerinde tüm sütunlar için vektörel hesapla"""
+        arr = ctx.num_arr
+        if arr.shape[0] == 0:
+            return {col: dict.fromkeys(('mean', 'median', 'std', 'min', 'max'), np.nan) for col in ctx.num_cols}
+        
+        with warnings.catch_warnings():
+            # Tamamen boş sütunlar NaN verir (çağıran tarafta 0.0'a çevrilir)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(arr, axis=0)
+            # Popülasyon std: az önce hesaplanan ortalama yeniden kullanılır
+            std = np.sqrt(np.nanmean((arr - mean) ** 2, axis=0))
+            median = np.nanmedian(arr, axis=0)
+            low = np.nanmin(arr, axis=0)
+            high = np.nanmax(arr, axis=0)
+        
+        return {
+            col: {'mean': mean[j], 'median': median[j], 'std': std[j], 'min': low[j], 'max': high[j]}
+            for j, col in enumerate(ctx.num_cols)
+        }
     
-    def _generate_business_insights(self, df: pd.DataFrame) -> List[Dict]:
+    def _compute_outlier_report(self, ctx: _Ctx) -> Dict[Any, Dict]:
+        """Tüm sayısal sütunlar için IQR aykırı değer raporu (tek nanquantile çağrısı)"""
+        df = ctx.df
+        cached = self._outlier_cache.get(id(df))
+        if cached is not None:
+            return cached
+        
+        num_cols = ctx.num_cols
+        report = {}
+        
+        wide = len(num_cols) >= PARALLEL_MIN_COLUMNS
+        if len(df) >= 4 and (NUMBA_AVAILABLE or (JOBLIB_AVAILABLE and wide)):
+            columns = ((col, ctx.num_arr[:, j]) for j, col in enumerate(num_cols))
+            if JOBLIB_AVAILABLE and wide:
+                # Geniş tablolar: sütunlar birbirinden bağımsız, thread'lerde paralel tara
+                results = Parallel(n_jobs=-1, prefer='threads', batch_size='auto')(
+                    delayed(_per_col_outliers)(col, arr, len(df)) for col, arr in columns
+                )
+            else:
+                results = [_per_col_outliers(col, arr, len(df)) for col, arr in columns]
+            report = dict(results)
+        elif len(num_cols) and len(df) >= 4:
+            arr = ctx.num_arr
+            with warnings.catch_warnings():
+                # Tamamen boş sütunlar NaN sınır verir, aykırı değer sayılmaz
+                warnings.simplefilter('ignore', RuntimeWarning)
+                q1, q3 = np.nanquantile(arr, [0.25, 0.75], axis=0)
+            iqr = q3 - q1
+            lower = q1 - 1.5 * iqr
+            upper = q3 + 1.5 * iqr
+            mask = (arr < lower) | (arr > upper)
+            counts = np.count_nonzero(mask, axis=0)
+            
+            for j, col in enumerate(num_cols):
+                count = int(counts[j])
+                report[col] = {
+                    'count': count,
+                    'percentage': count / len(df) * 100,
+                    'first_5_values': arr[mask[:, j], j][:5].tolist(),
+                    'lower': float(lower[j]),
+                    'upper': float(upper[j])
+                }
+        else:
+            for col in num_cols:
+                report[col] = {'count': 0, 'percentage': 0.0, 'first_5_values': [], 'lower': np.nan, 'upper': np.nan}
+        
+        self._outlier_cache[id(df)] = report
+        return report
+    
+    def _generate_business_insights(self, ctx: _Ctx) -> List[Dict]:
         """İş zekası insight'ları"""
         
         insights = []
         
         # Sales veri analizi
-        if self._is_sales_data(df):
-            insights.extend(self._analyze_sales_performance(df))
+        if ctx.groups['sales_cols']:
+            insights.extend(self._analyze_sales_performance(ctx))
         
         # HR veri analizi  
-        elif self._is_hr_data(df):
-            insights.extend(self._analyze_hr_metrics(df))
+        elif ctx.groups['hr_cols']:
+            insights.extend(self._analyze_hr_metrics(ctx))
         
         # Genel pattern'lar
-        insights.extend(self._analyze_general_patterns(df))
+        insights.extend(self._analyze_general_patterns(ctx))
         
         return insights
     
-    def _is_sales_data(self, df: pd.DataFrame) -> bool:
-        """Satış verisi mi kontrolü"""
-        columns_text = ' '.join([str(col).lower() for col in df.columns])
-        return any(word in columns_text for word in ['ciro', 'satış', 'sales', 'revenue', 'mağaza', 'store'])
-    
-    def _is_hr_data(self, df: pd.DataFrame) -> bool:
-        """İK verisi mi kontrolü"""
-        columns_text = ' '.join([str(col).lower() for col in df.columns])
-        return any(word in columns_text for word in ['maaş', 'salary', 'çalışan', 'employee', 'departman'])
-    
-    def _analyze_sales_performance(self, df: pd.DataFrame) -> List[Dict]:
+    def _analyze_sales_performance(self, ctx: _Ctx) -> List[Dict]:
         """Satış performans analizi"""
         
+        df, columns = ctx.df, ctx.groups
         insights = []
         
-        # Ciro sütunlarını bul
-        ciro_columns = [col for col in df.columns if 'ciro' in str(col).lower()]
-        growth_columns = [col for col in df.columns if 'büyüme' in str(col).lower() or 'growth' in str(col).lower()]
+        ciro_columns = columns['ciro_cols']
+        growth_columns = columns['growth_cols']
         
         if len(ciro_columns) >= 2:
             # Performans karşılaştırması
             col1, col2 = ciro_columns[0], ciro_columns[1]
             
-            total_growth = ((df[col2].sum() - df[col1].sum()) / df[col1].sum() * 100)
-            positive_growth_stores = (df[col2] > df[col1]).sum()
-            negative_growth_stores = (df[col2] < df[col1]).sum()
+            # Sütunları bir kez numpy'a al, tüm karşılaştırmalar aynı fark dizisinden
+            prev = df[col1].to_numpy(dtype=np.float64, na_value=np.nan)
+            curr = df[col2].to_numpy(dtype=np.float64, na_value=np.nan)
+            growth_diff = curr - prev
+            prev_total = np.nansum(prev)
+            
+            total_growth = ((np.nansum(curr) - prev_total) / prev_total * 100)
+            positive_growth_stores = int(np.count_nonzero(growth_diff > 0))
+            negative_growth_stores = int(np.count_nonzero(growth_diff < 0))
             
             insights.append({
                 'type': 'sales_performance',
@@ -157,18 +444,17 @@ class AdvancedAnalyticsEngine:
                 'severity': 'critical' if total_growth < -10 else 'warning' if total_growth < 0 else 'good'
             })
             
-            # Top/Bottom performerlar
-            growth_diff = df[col2] - df[col1]
-            top_performer_idx = growth_diff.idxmax()
-            bottom_performer_idx = growth_diff.idxmin()
+            # Top/Bottom performerlar (konumsal indeks, NaN farklar atlanır)
+            store_col = columns['store_cols'][0] if columns['store_cols'] else None
             
-            store_col = next((col for col in df.columns if 'mağaza' in str(col).lower() or 'store' in str(col).lower()), None)
-            
-            if store_col:
-                top_store = df.loc[top_performer_idx, store_col]
-                bottom_store = df.loc[bottom_performer_idx, store_col]
-                top_growth = growth_diff.loc[top_performer_idx]
-                bottom_growth = growth_diff.loc[bottom_performer_idx]
+            if store_col and not np.isnan(growth_diff).all():
+                top_i = int(np.nanargmax(growth_diff))
+                bottom_i = int(np.nanargmin(growth_diff))
+                stores = df[store_col].to_numpy()
+                top_store = stores[top_i]
+                bottom_store = stores[bottom_i]
+                top_growth = growth_diff[top_i]
+                bottom_growth = growth_diff[bottom_i]
                 
                 insights.append({
                     'type': 'performance_leaders',
@@ -194,14 +480,15 @@ class AdvancedAnalyticsEngine:
         
         return insights
     
-    def _analyze_hr_metrics(self, df: pd.DataFrame) -> List[Dict]:
+    def _analyze_hr_metrics(self, ctx: _Ctx) -> List[Dict]:
         """İK metrikleri analizi"""
         
+        df, columns = ctx.df, ctx.groups
         insights = []
         
         # Maaş analizi
-        salary_columns = [col for col in df.columns if 'maaş' in str(col).lower() or 'salary' in str(col).lower()]
-        dept_columns = [col for col in df.columns if 'departman' in str(col).lower()]
+        salary_columns = columns['salary_cols']
+        dept_columns = columns['dept_cols']
         
         if salary_columns and dept_columns:
             salary_col = salary_columns[0]
@@ -220,9 +507,10 @@ class AdvancedAnalyticsEngine:
                 'severity': 'info'
             })
             
-            # Maaş dağılımı
-            salary_std = df[salary_col].std()
-            salary_mean = df[salary_col].mean()
+            # Maaş dağılımı: ortalama ve popülasyon std tek tampon üzerinden
+            salaries = df[salary_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            salary_mean = np.nanmean(salaries)
+            salary_std = np.sqrt(np.nanmean((salaries - salary_mean) ** 2))
             cv = (salary_std / salary_mean) * 100  # Variation coefficient
             
             insights.append({
@@ -235,13 +523,13 @@ class AdvancedAnalyticsEngine:
         
         return insights
     
-    def _analyze_general_patterns(self, df: pd.DataFrame) -> List[Dict]:
+    def _analyze_general_patterns(self, ctx: _Ctx) -> List[Dict]:
         """Genel pattern analizi"""
         
         insights = []
         
         # Veri kalitesi
-        missing_percentage = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+        missing_percentage = ctx.missing_pct
         
         insights.append({
             'type': 'data_quality',
@@ -253,132 +541,134 @@ class AdvancedAnalyticsEngine:
         
         return insights
     
-    def _detect_anomalies(self, df: pd.DataFrame) -> List[Dict]:
+    def _detect_anomalies(self, ctx: _Ctx) -> List[Dict]:
         """Anomali tespiti"""
         
         anomalies = []
         
-        for col in df.select_dtypes(include=[np.number]).columns:
-            outlier_count = self._count_outliers(df[col])
+        for col, report in self._compute_outlier_report(ctx).items():
+            outlier_count = report['count']
             if outlier_count > 0:
-                outlier_percentage = (outlier_count / len(df)) * 100
-                
-                # Aykırı değerlerin indekslerini bul
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                
-                outlier_values = df[col][(df[col] < lower_bound) | (df[col] > upper_bound)]
+                outlier_percentage = report['percentage']
                 
                 anomalies.append({
                     'column': str(col),
-                    'count': int(outlier_count),
-                    'percentage': float(outlier_percentage),
-                    'values': [float(x) for x in outlier_values.head(5).tolist()],  # İlk 5 aykırı değer
+                    'count': outlier_count,
+                    'percentage': outlier_percentage,
+                    'values': report['first_5_values'],  # İlk 5 aykırı değer
                     'severity': 'high' if outlier_percentage > 10 else 'medium' if outlier_percentage > 5 else 'low'
                 })
         
         return anomalies
     
-    def _analyze_correlations(self, df: pd.DataFrame) -> Dict:
+    def _analyze_correlations(self, ctx: _Ctx) -> Dict:
         """Korelasyon analizi"""
         
-        numeric_df = df.select_dtypes(include=[np.number])
+        numeric_df = ctx.num_df
         
         if len(numeric_df.columns) < 2:
             return {'correlations': [], 'insights': []}
         
-        corr_matrix = numeric_df.corr()
+        # Eksik değer yoksa doğrudan BLAS üzerinden, varsa maskeli korelasyon
+        with warnings.catch_warnings():
+            # Sabit sütunların korelasyonu NaN olur ve eşik filtresinden geçmez
+            warnings.simplefilter('ignore', RuntimeWarning)
+            if np.isfinite(ctx.num_arr).all():
+                corr = np.corrcoef(ctx.num_arr, rowvar=False)
+            else:
+                corr = np.ma.corrcoef(np.ma.masked_invalid(ctx.num_arr), rowvar=False).filled(np.nan)
         correlations = []
         insights = []
         
-        # Güçlü korelasyonları bul
-        for i, col1 in enumerate(numeric_df.columns):
-            for j, col2 in enumerate(numeric_df.columns):
-                if i < j:  # Tekrarları önle
-                    corr_value = corr_matrix.loc[col1, col2]
-                    if abs(corr_value) > 0.5:  # Orta-güçlü korelasyon
-                        correlations.append({
-                            'column1': str(col1),
-                            'column2': str(col2),
-                            'correlation': float(corr_value),
-                            'strength': 'strong' if abs(corr_value) > 0.8 else 'moderate'
-                        })
+        # Güçlü korelasyonları üst üçgenden bul (tekrarsız, köşegensiz)
+        iu = np.triu_indices_from(corr, k=1)
+        vals = corr[iu]
+        abs_vals = np.abs(vals)
+        mask = abs_vals > 0.5  # Orta-güçlü korelasyon
+        columns = numeric_df.columns
+        for col1, col2, corr_value, abs_value in zip(columns[iu[0][mask]], columns[iu[1][mask]],
+                                                      vals[mask].tolist(), abs_vals[mask].tolist()):
+            correlations.append({
+                'column1': str(col1),
+                'column2': str(col2),
+                'correlation': corr_value,
+                'strength': 'strong' if abs_value > 0.8 else 'moderate'
+            })
         
         # Korelasyon insight'ları
         if correlations:
-            strongest = max(correlations, key=lambda x: abs(x['correlation']))
+            strongest = correlations[int(np.argmax(abs_vals[mask]))]
             insights.append(f"En güçlü korelasyon: {strongest['column1']} ve {strongest['column2']} arasında (r={strongest['correlation']:.3f})")
         
         return {'correlations': correlations, 'insights': insights}
     
-    def _analyze_trends(self, df: pd.DataFrame) -> Dict:
+    def _analyze_trends(self, ctx: _Ctx, ciro_sums: Dict[Any, float]) -> Dict:
         """Trend analizi"""
         
         trends = []
         
-        # Zaman sütunu varsa trend analizi yap
-        date_columns = df.select_dtypes(include=['datetime64', 'object']).columns
-        numeric_columns = df.select_dtypes(include=[np.number]).columns
-        
         # Ciro kollarından trend çıkarımı (2024 vs 2025)
-        ciro_columns = [col for col in df.columns if 'ciro' in str(col).lower()]
+        ciro_columns = ctx.groups['ciro_cols']
         
         if len(ciro_columns) >= 2:
             # Zamana dayalı trend simülasyonu
             col1, col2 = ciro_columns[0], ciro_columns[1]
             
             # Genel trend
-            total_change = df[col2].sum() - df[col1].sum()
+            total_change = ciro_sums[col2] - ciro_sums[col1]
             trend_direction = 'upward' if total_change > 0 else 'downward' if total_change < 0 else 'stable'
             
             trends.append({
                 'metric': 'total_revenue',
                 'direction': trend_direction,
                 'change_amount': float(total_change),
-                'change_percentage': float((total_change / df[col1].sum()) * 100),
+                'change_percentage': float((total_change / ciro_sums[col1]) * 100),
                 'confidence': 'high'
             })
         
         return {'trends': trends}
     
-    def _perform_segmentation(self, df: pd.DataFrame) -> Dict:
+    def _perform_segmentation(self, ctx: _Ctx) -> Dict:
         """Segment analizi"""
         
+        df = ctx.df
         segments = []
         
-        if not ADVANCED_STATS_AVAILABLE:
+        if not self._lazy_import():
             return {'segments': [], 'method': 'basic'}
         
         # Sayısal sütunlar için K-means clustering
-        numeric_df = df.select_dtypes(include=[np.number])
+        numeric_df = ctx.num_df
         
         if len(numeric_df.columns) >= 2 and len(df) >= 5:
             try:
-                # Veriyi standardize et
-                scaler = StandardScaler()
-                scaled_data = scaler.fit_transform(numeric_df.fillna(0))
+                # Eksik değerleri medyanla doldur ve standardize et
+                imputed = self._sklearn_imputer(strategy='median').fit_transform(numeric_df)
+                scaled_data = self._sklearn_scaler().fit_transform(imputed)
                 
-                # K-means clustering (3 segment)
-                kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-                cluster_labels = kmeans.fit_predict(scaled_data)
+                # K-means clustering (3 segment); büyük tablolarda mini-batch
+                limits = threadpool_limits(limits=os.cpu_count(), user_api='blas') if THREADPOOLCTL_AVAILABLE else nullcontext()
+                with limits:
+                    if len(df) > MINIBATCH_MIN_ROWS:
+                        kmeans = self._sklearn_minibatch_kmeans(n_clusters=3, batch_size=1024, n_init=3, random_state=42)
+                        cluster_labels = kmeans.fit(scaled_data).predict(scaled_data)
+                    else:
+                        kmeans = self._sklearn_kmeans(n_clusters=3, random_state=42, n_init=10, algorithm='elkan')
+                        cluster_labels = kmeans.fit_predict(scaled_data)
                 
-                # Segment özellikleri
-                df_with_clusters = df.copy()
-                df_with_clusters['segment'] = cluster_labels
+                # Segment boyutları tek bincount ile, özellikler tek groupby ile (kopya yok)
+                sizes = np.bincount(cluster_labels, minlength=3)
+                segment_stats = numeric_df.groupby(cluster_labels).agg(['mean', 'median', 'std'])
                 
                 for i in range(3):
-                    segment_data = df_with_clusters[df_with_clusters['segment'] == i]
-                    segment_size = len(segment_data)
+                    segment_size = int(sizes[i])
                     
                     if segment_size > 0:
                         segments.append({
-                            'segment_id': int(i),
-                            'size': int(segment_size),
-                            'percentage': float((segment_size / len(df)) * 100),
-                            'characteristics': self._describe_segment(segment_data, numeric_df.columns)
+                            'segment_id': i,
+                            'size': segment_size,
+                            'percentage': (segment_size / len(df)) * 100,
+                            'characteristics': self._describe_segment(segment_stats.loc[i], numeric_df.columns)
                         })
                 
             except Exception as e:
@@ -386,36 +676,34 @@ class AdvancedAnalyticsEngine:
         
         return {'segments': segments, 'method': 'kmeans' if segments else 'basic'}
     
-    def _describe_segment(self, segment_df: pd.DataFrame, numeric_columns: List[str]) -> Dict:
+    def _describe_segment(self, segment_stats: pd.Series, numeric_columns: List[str]) -> Dict:
         """Segment özelliklerini tanımla"""
         
         characteristics = {}
         
         for col in numeric_columns:
-            if col in segment_df.columns:
-                mean_val = segment_df[col].mean()
-                characteristics[str(col)] = {
-                    'mean': float(mean_val),
-                    'median': float(segment_df[col].median()),
-                    'std': float(segment_df[col].std())
-                }
+            characteristics[str(col)] = {
+                'mean': float(segment_stats[(col, 'mean')]),
+                'median': float(segment_stats[(col, 'median')]),
+                'std': float(segment_stats[(col, 'std')])
+            }
         
         return characteristics
     
-    def _generate_forecasts(self, df: pd.DataFrame) -> Dict:
+    def _generate_forecasts(self, ctx: _Ctx, ciro_sums: Dict[Any, float]) -> Dict:
         """Tahmin analizi"""
         
         forecasts = []
         
         # Ciro sütunlarından basit trend tahmini
-        ciro_columns = [col for col in df.columns if 'ciro' in str(col).lower()]
+        ciro_columns = ctx.groups['ciro_cols']
         
         if len(ciro_columns) >= 2:
             col1, col2 = ciro_columns[0], ciro_columns[1]
             
             # Linear trend hesaplama
-            current_total = df[col2].sum()
-            previous_total = df[col1].sum()
+            current_total = ciro_sums[col2]
+            previous_total = ciro_sums[col1]
             growth_rate = (current_total - previous_total) / previous_total
             
             # Gelecek yıl tahmini
@@ -479,6 +767,17 @@ class AdvancedAnalyticsEngine:
         return recommendations
 
 
+def _read_excel(path: str) -> pd.DataFrame:
+    """Excel dosyasını oku; varsa Rust tabanlı calamine motoru ile"""
+    if CALAMINE_AVAILABLE:
+        try:
+            return pd.read_excel(path, engine='calamine')
+        except ValueError:
+            # pandas < 2.2 calamine motorunu tanımıyor, openpyxl'e düş
+            pass
+    return pd.read_excel(path)
+
+
 def test_advanced_analytics():
     """Gelişmiş analitik motoru test et"""
     
@@ -487,7 +786,6 @@ def test_advanced_analytics():
     engine = AdvancedAnalyticsEngine()
     
     # Sales.xlsx dosyasını test et
-    import os
     test_files = ['company_data/sales.xlsx', 'sales.xlsx']
     
     for filename in test_files:
@@ -496,7 +794,7 @@ def test_advanced_analytics():
             print("=" * 50)
             
             try:
-                df = pd.read_excel(filename)
+                df = _read_excel(filename)
                 analysis = engine.comprehensive_analysis(df, filename)
                 
                 # Temel istatistikler
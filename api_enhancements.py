@@ -1,6 +1,18 @@
 
 # app.py API Geliştirmeleri - MANUEL ENTEGRASYON
 
+# Gerekli import'lar (app.py başına):
+import orjson
+from flask import Response
+
+def json_response(obj, status=200):
+    """orjson ile JSON yanıtı - numpy skalerleri dönüştürmeden serileştirir"""
+    return Response(
+        orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
+
 # Yeni endpoint'ler ekle:
 
 @app.route('/api/advanced-analytics', methods=['POST'])
@@ -18,7 +30,7 @@ def advanced_analytics():
         # Analytics engine kullan
         if hasattr(ai_assistant, 'analytics_engine') and ai_assistant.analytics_engine:
             result = ai_assistant._handle_advanced_analytics(query, {})
-            return jsonify(result)
+            return json_response(result)
         else:
             return jsonify({"error": "Gelişmiş analitik sistemi aktif değil"}), 503
             
@@ -34,12 +46,21 @@ def get_data_insights(filename):
         # Veri insights'ları döndür
         if filename in ai_assistant.data_insights:
             insights = ai_assistant.data_insights[filename]
-            return jsonify({
+            
+            # İçerik değişmediyse istemci önbelleğini kullansın
+            etag = insights.get('advanced_analysis', {}).get('etag')
+            if etag and request.if_none_match.contains(etag):
+                return '', 304
+            
+            response = json_response({
                 "filename": filename,
                 "insights": insights.get('smart_insights', []),
                 "suggestions": insights.get('query_suggestions', []),
                 "analysis_summary": insights.get('basic_analysis', {})
             })
+            if etag:
+                response.set_etag(etag)
+            return response
         else:
             return jsonify({"error": "Dosya bulunamadı"}), 404
             
@@ -52,16 +73,15 @@ def get_data_insights(filename):
 def system_status():
     """Sistem durumu - YENİ"""
     try:
-        status = {
-            "core_system": True,
-            "enhanced_processor": hasattr(ai_assistant, 'new_processor') and ai_assistant.new_processor is not None,
-            "analytics_engine": hasattr(ai_assistant, 'analytics_engine') and ai_assistant.analytics_engine is not None,
-            "smart_intent": hasattr(ai_assistant, 'smart_intent') and ai_assistant.smart_intent is not None,
-            "data_files": list(ai_assistant.structured_data.keys()),
-            "last_updated": datetime.now().isoformat()
-        }
+        status = {"core_system": True}
+        status.update({
+            name: getattr(ai_assistant, attr, None) is not None
+            for name, attr in ai_assistant._component_registry.items()
+        })
+        status["data_files"] = ai_assistant.get_data_files()
+        status["last_updated"] = datetime.now().isoformat()
         
-        return jsonify(status)
+        return json_response(status)
         
     except Exception as e:
         logging.error(f"System status hatası: {e}")
@@ -2,7 +2,12 @@
 
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+import threading
+import time
+import orjson
+from decimal import Decimal
+from flask import Flask, Response, render_template, request, redirect, url_for
+from flask.json.provider import JSONProvider
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 
 from auth import User, load_user, verify_user
@@ -12,8 +17,42 @@ from assistant import AIAssistant
 # --- Loglama Kurulumu ---
 logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# --- JSON Yanıtları ---
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _json_default(obj):
+    """orjson'un doğrudan tanımadığı tipler (DataFrame'lerden gelen Timestamp/NaT, Decimal, set)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'isoformat'):
+        return None if obj != obj else obj.isoformat()  # NaT kendisine eşit değildir
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(obj).__name__}")
+
+def dumps_json(obj) -> bytes:
+    """orjson ile serileştirme - numpy skalerleri dönüştürmeden, boşluksuz"""
+    return orjson.dumps(obj, default=_json_default, option=ORJSON_OPTIONS)
+
+def json_response(obj, status=200):
+    """orjson ile JSON yanıtı"""
+    return Response(dumps_json(obj), status=status, mimetype='application/json')
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON sağlayıcısı: jsonify ve request.get_json de orjson üzerinden çalışır"""
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_json(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        return self._app.response_class(dumps_json(self._prepare_response_obj(args, kwargs)), mimetype='application/json')
+
 # --- Flask Uygulaması ve Eklentilerin Kurulumu ---
 app = Flask(__name__)
+app.json_provider_class = OrjsonProvider
+app.json = OrjsonProvider(app)
 
 # Secret key için environment variable kontrolü
 secret_key = FLASK_SECRET_KEY or os.environ.get('FLASK_SECRET_KEY')
@@ -37,12 +76,38 @@ def user_loader(user_id: str) -> User:
 
 # --- AI Assistant'ı Başlatma ---
 # Uygulama başlatıldığında sadece bir tane AI Assistant nesnesi oluşturulur.
-try:
-    ai_assistant = AIAssistant()
-    logging.info("AI Assistant başarıyla başlatıldı.")
-except Exception as e:
-    logging.error(f"AI Assistant başlatılırken hata: {e}")
-    ai_assistant = None
+# Veri yükleme ve model hazırlığı arka planda yapılır; Flask bu sırada istek kabul etmeye başlar.
+# Not: gunicorn --preload ile kullanmayın, master'da başlayan thread fork sonrası worker'lara geçmez.
+ai_assistant = None
+ai_ready = threading.Event()
+
+def _warm_up_assistant():
+    global ai_assistant
+    try:
+        ai_assistant = AIAssistant()
+        logging.info("AI Assistant başarıyla başlatıldı.")
+    except Exception as e:
+        logging.error(f"AI Assistant başlatılırken hata: {e}")
+        ai_assistant = None
+    finally:
+        ai_ready.set()
+
+def _start_warm_up():
+    """
+    Açılış işini gerçek bir OS thread'inde başlatır.
+    gevent worker monkey-patch uyguladıysa threading.Thread bir greenlet olur; CPU yoğun yükleme hub'ı bloklar,
+    /health cevap veremez ve heartbeat kaçar. Bu durumda iş gevent hub'ının yerel thread havuzunda çalıştırılır.
+    """
+    try:
+        from gevent import monkey, get_hub
+    except ImportError:
+        monkey = None
+    if monkey is not None and monkey.is_module_patched('threading'):
+        get_hub().threadpool.spawn(_warm_up_assistant)
+    else:
+        threading.Thread(target=_warm_up_assistant, name='ai-warmup', daemon=True).start()
+
+_start_warm_up()
 
 # --- Route Tanımları ---
 @app.route('/')
@@ -80,26 +145,36 @@ def logout():
     return redirect(url_for('login'))
 
 # --- API Endpoints ---
+# Load balancer yoklamaları sık gelir: health gövdesi bir kez, status gövdesi en fazla saniyede bir serileştirilir.
+# Response nesnesi paylaşılmaz (after_request cookie vb. ekleyebilir), yalnızca bayt gövdesi yeniden kullanılır.
+_HEALTH_BODY = dumps_json({"status": "healthy", "app": APP_NAME})
+STATUS_CACHE_SECONDS = 1.0
+_status_body = None
+_status_expires = 0.0
+
 @app.route('/api/query', methods=['POST'])
 @login_required
 def handle_query():
     """Kullanıcı sorgularını alır ve AI'ya işlettirir"""
     try:
+        if not ai_ready.is_set():
+            return json_response({"error": "AI Assistant hazırlanıyor. Lütfen birkaç saniye sonra tekrar deneyin."}, 503)
+        
         if not ai_assistant:
-            return jsonify({"error": "AI Assistant başlatılamadı. Lütfen sistem yöneticisiyle iletişime geçin."}), 500
+            return json_response({"error": "AI Assistant başlatılamadı. Lütfen sistem yöneticisiyle iletişime geçin."}, 500)
             
         if not request.is_json:
-            return jsonify({"error": "Geçersiz istek: JSON bekleniyordu."}), 400
+            return json_response({"error": "Geçersiz istek: JSON bekleniyordu."}, 400)
             
         data = request.get_json()
         user_query = data.get('query', '').strip()
         
         if not user_query:
-            return jsonify({"error": "Sorgu boş olamaz."}), 400
+            return json_response({"error": "Sorgu boş olamaz."}, 400)
         
         # Query uzunluğu kontrolü
         if len(user_query) > 1000:
-            return jsonify({"error": "Sorgu çok uzun. Lütfen daha kısa bir soru sorun."}), 400
+            return json_response({"error": "Sorgu çok uzun. Lütfen daha kısa bir soru sorun."}, 400)
         
         logging.info(f"Kullanıcı '{current_user.id}' sorgu gönderdi: '{user_query[:100]}{'...' if len(user_query) > 100 else ''}'")
         
@@ -109,7 +184,7 @@ def handle_query():
             # Sonuç kontrolü
             if not isinstance(result, dict):
                 logging.error(f"AI assistant beklenmedik sonuç döndürdü: {type(result)}")
-                return jsonify({"error": "AI sisteminden geçersiz yanıt alındı."}), 500
+                return json_response({"error": "AI sisteminden geçersiz yanıt alındı."}, 500)
             
             if 'text' not in result:
                 logging.error(f"AI assistant sonucunda 'text' anahtarı bulunamadı: {result}")
@@ -119,7 +194,7 @@ def handle_query():
                 result['chart'] = None
                 
             logging.info(f"Sorgu başarıyla işlendi. Yanıt uzunluğu: {len(result.get('text', ''))}")
-            return jsonify(result)
+            return json_response(result)
             
         except Exception as processing_error:
             logging.error(f"Sorgu işleme hatası: {processing_error}", exc_info=True)
@@ -134,27 +209,35 @@ def handle_query():
             elif "connection" in str(processing_error).lower():
                 error_message = "Dış API bağlantı hatası. Lütfen tekrar deneyin."
             
-            return jsonify({"error": error_message}), 500
+            return json_response({"error": error_message}, 500)
             
     except Exception as outer_error:
         logging.critical(f"API endpoint kritik hatası: {outer_error}", exc_info=True)
-        return jsonify({"error": "Sunucu hatası. Lütfen yöneticiye bildirin."}), 500
+        return json_response({"error": "Sunucu hatası. Lütfen yöneticiye bildirin."}, 500)
 
 @app.route('/api/status')
 @login_required
 def get_status():
     """AI sisteminin durumunu döndürür."""
+    if not ai_ready.is_set():
+        return json_response({"error": "AI Assistant hazırlanıyor"}, 503)
     if ai_assistant:
-        return jsonify(ai_assistant.get_status())
+        global _status_body, _status_expires
+        now = time.monotonic()
+        if _status_body is None or now >= _status_expires:
+            _status_body = dumps_json(ai_assistant.get_status())
+            _status_expires = now + STATUS_CACHE_SECONDS
+        return Response(_status_body, mimetype='application/json')
     else:
-        return jsonify({"error": "AI Assistant başlatılamadı"}), 500
+        return json_response({"error": "AI Assistant başlatılamadı"}, 500)
 
 @app.route('/health')
 def health_check():
     """Health check endpoint for deployment platforms"""
-    return jsonify({"status": "healthy", "app": APP_NAME}), 200
+    return Response(_HEALTH_BODY, status=200, mimetype='application/json')
 
 if __name__ == '__main__':
+    # Sadece geliştirme sunucusu: production'da `gunicorn app:app` kullanın (ayarlar gunicorn.conf.py'de)
     # Production deployment için port ayarı
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('FLASK_ENV') == 'development'
@@ -6,21 +6,150 @@ GÜNCELLEME: Mathematics Engine entegrasyonu eklendi.
 """
 import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+import orjson
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+try:
+    import re2 as _regex_engine
+    RE2_AVAILABLE = True
+except ImportError:
+    _regex_engine = re
+    RE2_AVAILABLE = False
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 from auth import User
 from config import (DATA_DIRECTORY, GENERATIVE_MODEL_API_URL, SERPAPI_API_KEY,
-                    CONTEXT_MAX_LENGTH, SIMILARITY_SEARCH_K)
+                    CONTEXT_MAX_LENGTH, SIMILARITY_SEARCH_K, SPECULATIVE_WEB_SEARCH,
+                    QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
 from data_loader import UniversalDataLoader
 from knowledge_processor import KnowledgeProcessor
 from nlp_processor import SmartNLPProcessor
 from mathematics_engine import MathematicsEngine  # YENİ EKLENEN
 
+# Matematik sorgusu tespiti: anahtar kelimeler ve pattern'lar modül yüklenirken bir kez derlenir
+MATH_KEYWORDS = [
+    # Temel işlemler
+    'kaç eder', 'hesapla', 'topla', 'çıkar', 'çarp', 'böl',
+    '+', '-', '*', '/', 'toplam', 'fark', 'çarpım', 'bölüm',
+    
+    # İstatistik - DAHA SPESİFİK
+    'ortalama maaş', 'medyan', 'maksimum', 'minimum', 'standart sapma',
+    'mean', 'median', 'max', 'min', 'std', 'average',
+    'en yüksek maaş', 'en düşük maaş', 'en büyük', 'en küçük',
+    
+    # Yüzde hesaplamaları
+    'yüzde', '%', 'artış', 'azalış', 'büyüme oranı', 'yüzde kaç',
+    'oranı', 'değişim', 'artış oranı', 'düşüş oranı',
+    
+    # Özel matematik sorguları
+    'kaç kat', 'kat', 'misli', 'çalışan sayısı', 'toplam çalışan',
+    'kaç çalışan', 'toplam.*çalışan'
+]
+
+MATH_CONTEXT_WORDS = [
+    'maaş', 'ciro', 'satış', 'gelir', 'gider', 'kar', 'zarar',
+    'çalışan sayısı', 'toplam', 'ortalama', 'hesapla'
+]
+
+_MATH_PATTERNS = (
+    r'\d+\s*[+\-*/]\s*\d+',  # 5 + 3, 100 * 12 gibi
+    r'\d+.*ile.*\d+',  # 5 ile 3 çarp gibi
+    r'.*maaş.*kaç kat.*',  # maaş kaç kat sorguları
+    r'toplam.*sayı.*'  # toplam sayı sorguları
+)
+_MATH_CONTEXT = '|'.join(map(re.escape, MATH_CONTEXT_WORDS))
+# Anahtar kelimeler, pattern'lar ve "sayı + matematik bağlamı" kuralı tek bir ifadede birleştirilir;
+# google-re2 kuruluysa geri izlemesiz DFA ile doğrusal zamanda taranır
+_MATH_KEYWORDS_SOURCE = '|'.join(map(re.escape, MATH_KEYWORDS))
+_MATH_QUERY_SOURCE = '|'.join((
+    _MATH_KEYWORDS_SOURCE,
+    *_MATH_PATTERNS,
+    rf'(?s:\d.*(?:{_MATH_CONTEXT})|(?:{_MATH_CONTEXT}).*\d)',
+))
+_MATH_QUERY_RE = _regex_engine.compile(_MATH_QUERY_SOURCE)
+# Rakam içermeyen sorgularda sayı gerektiren kurallar eşleşemez; yalnızca anahtar kelimeler taranır
+_MATH_KEYWORDS_RE = _regex_engine.compile(_MATH_KEYWORDS_SOURCE)
+# Tek kelimelik anahtar kelimeler: sorgu kelimelerinden biri bunlardan biriyse regex'e gerek yok
+_MATH_TOKENS = frozenset(k for k in MATH_KEYWORDS if k.isalpha())
+
+# Araçların aradığı sütun rolleri: rol -> sütun adında aranan anahtar kelimeler
+COLUMN_ROLE_KEYWORDS = {
+    'store': ('mağaza', 'store', 'şube'),
+    'employee': ('ad soyad',),
+    'person': ('ad soyad', 'çalışan'),
+    'department': ('departman',),
+}
+
+
+def _detect_columns(df: pd.DataFrame) -> Dict[str, Any]:
+    """Her rol için anahtar kelimesi geçen ilk sütunu ve ciro sütunlarını tek geçişte bulur."""
+    found: Dict[str, Any] = dict.fromkeys(COLUMN_ROLE_KEYWORDS)
+    found['ciro_cols'] = []
+    for col in df.columns:
+        col_lower = str(col).lower()
+        for role, keywords in COLUMN_ROLE_KEYWORDS.items():
+            if found[role] is None and any(k in col_lower for k in keywords):
+                found[role] = col
+        if isinstance(col, str) and 'ciro' in col_lower:
+            found['ciro_cols'].append(col)
+    return found
+
+
+def _coerce_numeric_columns(df: pd.DataFrame) -> None:
+    """Değerleri zaten sayı olan object sütunlarını (Excel'den karışık gelen int/float) sayısal dtype'a çevirir."""
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True) in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+            df[col] = pd.to_numeric(df[col])
+
+
+def _convert_string_columns(df: pd.DataFrame) -> None:
+    """Yalnızca metin içeren object sütunlarını Arrow destekli 'string[pyarrow]' dtype'ına çevirir.
+    .str işlemleri Python str nesneleri yerine bitişik UTF-8 tamponlar üzerinde Arrow çekirdekleriyle çalışır."""
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+            df[col] = df[col].astype('string[pyarrow]')
+
+
+def _build_row_index(series: pd.Series) -> Dict[str, int]:
+    """Normalize edilmiş (strip + casefold) değer -> ilk geçtiği satırın konumu.
+    strip + casefold + ekleme tek geçişte yapılır; ara .str Series'leri oluşturulmaz."""
+    index: Dict[str, int] = {}
+    for position, (value, present) in enumerate(zip(series.tolist(), series.notna().tolist())):
+        if present:
+            index.setdefault(str(value).strip().casefold(), position)
+    return index
+
+
+def _build_group_index(keys: pd.Series, values: pd.Series) -> Dict[str, set]:
+    """Normalize edilmiş (casefold) anahtar -> o anahtara ait benzersiz değerler kümesi."""
+    frame = pd.DataFrame({'key': keys.astype('string').str.casefold(), 'value': values.to_numpy()}).dropna()
+    return {key: set(group.unique()) for key, group in frame.groupby('key')['value']}
+
 
 class AIAssistant:
+    # Niyet -> araç metodu adı; sözlük her sorguda yeniden kurulmasın diye sınıf seviyesinde
+    _TOOL_NAMES = {
+        "store_query": "_tool_get_store_data",
+        "individual_salary": "_tool_get_employee_data",
+        "list_all_employees": "_tool_get_employee_data",
+        "count_department_employees": "_tool_count_department_employees",
+        "web_search": "_tool_web_search",
+    }
+    
     def __init__(self):
         logging.info(f"AI Assistant beyni başlatılıyor...")
         self.data_loader = UniversalDataLoader()
@@ -28,15 +157,56 @@ class AIAssistant:
         self.nlp_proc = SmartNLPProcessor()
         self.math_engine = MathematicsEngine()  # YENİ EKLENEN - Mathematics Engine
         
+        # Gemini ve SerpAPI çağrıları için ortak, keep-alive bağlantı havuzlu oturum
+        self._http = requests.Session()
+        self._http.mount('https://', HTTPAdapter(
+            pool_connections=8, pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
+        # Gemini beklenirken yedek web aramasını paralel yürütmek için küçük iş havuzu
+        self._api_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ext-api')
+        # Tekrarlanan sorular için (sorgu, rol) -> (zaman, yanıt) LRU önbelleği
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        
         self.knowledge_base: Dict[str, any] = {}
         self.structured_data: Dict[str, pd.DataFrame] = {}
         self.data_insights: Dict[str, Dict] = {}
+        self._col_index: Dict[str, Dict[str, Any]] = {}
+        self._store_locator: Dict[str, Tuple[str, int]] = {}
+        self._employee_locator: Dict[str, Tuple[str, int]] = {}
+        self._department_members: Dict[str, Dict[str, set]] = {}
+        self._all_stores = pd.Index([])
+        self._all_employees = pd.Index([])
+        self._employee_list_text: Optional[str] = None
         self._initialize_system()
 
     def _initialize_system(self):
         """Sistemi başlatır, tüm verileri yükler ve işler."""
         logging.info(f"'{DATA_DIRECTORY}' klasöründen veriler yükleniyor...")
         self.knowledge_base, self.structured_data, self.data_insights = self.data_loader.load_all_data(DATA_DIRECTORY)
+        # Mathematics Engine'in her sorguda yaptığı to_numeric dönüşümü hazır sayısal sütunlarda kopyasız geçer
+        for df in self.structured_data.values():
+            _coerce_numeric_columns(df)
+            if PYARROW_AVAILABLE:
+                _convert_string_columns(df)
+        self._col_index = {filename: _detect_columns(df) for filename, df in self.structured_data.items()}
+        
+        # Mağaza/çalışan adı aramaları sorgu başına tek bir O(1) sözlük erişimi olsun
+        self._store_locator = self._build_locator('store')
+        self._employee_locator = self._build_locator('employee')
+        # Departman sayımı için: departman adı (casefold) -> çalışan adları
+        self._department_members = {}
+        for filename, df in self.structured_data.items():
+            cols = self._col_index[filename]
+            if cols['department'] and cols['employee']:
+                self._department_members[filename] = _build_group_index(df[cols['department']], df[cols['employee']])
+        self._all_stores = self._unique_column_values('store')
+        self._all_employees = self._unique_column_values('employee')
+        # "Tüm çalışanlar" yanıtı veri değişmediği sürece aynıdır; sıralama bir kez yapılır
+        if not self._all_employees.empty:
+            self._employee_list_text = (f"Toplam **{len(self._all_employees)}** çalışan bulundu:\n- "
+                                        + "\n- ".join(sorted(self._all_employees.tolist())))
         
         if not self.knowledge_base:
             logging.warning("Hiçbir veri yüklenemedi. Asistan sınırlı modda çalışacak.")
@@ -45,18 +215,28 @@ class AIAssistant:
         logging.info(f"Toplam {len(self.knowledge_base)} dosya yüklendi. AI hafızası oluşturuluyor...")
         self.knowledge_proc.process_knowledge_base(self.knowledge_base)
 
-        all_store_names = set()
-        all_employee_names = set()
-        for df in self.structured_data.values():
-            store_col = next((c for c in df.columns if any(k in c.lower() for k in ['mağaza', 'store', 'şube'])), None)
-            emp_col = next((c for c in df.columns if any(k in c.lower() for k in ['ad soyad', 'çalışan'])), None)
-            if store_col: all_store_names.update(df[store_col].dropna().unique())
-            if emp_col: all_employee_names.update(df[emp_col].dropna().unique())
-
-        self.nlp_proc.add_store_names(list(all_store_names))
-        self.nlp_proc.add_employee_names(list(all_employee_names))
+        self.nlp_proc.add_store_names(self._all_stores.tolist())
+        self.nlp_proc.add_employee_names(self._unique_column_values('person').tolist())
         logging.info("AI Assistant başlatma işlemi tamamlandı ve hazır.")
 
+    def _build_locator(self, role: str) -> Dict[str, Tuple[str, int]]:
+        """Normalize edilmiş değer -> (dosya adı, satır konumu); aynı değer birden çok dosyadaysa ilk dosya kazanır."""
+        locator: Dict[str, Tuple[str, int]] = {}
+        for filename, df in self.structured_data.items():
+            col = self._col_index[filename][role]
+            if not col: continue
+            for key, position in _build_row_index(df[col]).items():
+                locator.setdefault(key, (filename, position))
+        return locator
+
+    def _unique_column_values(self, role: str) -> pd.Index:
+        """Verilen roldeki sütunların tüm dosyalardaki benzersiz değerleri (tek concat + unique)."""
+        columns = [df[self._col_index[filename][role]]
+                   for filename, df in self.structured_data.items() if self._col_index[filename][role]]
+        if not columns:
+            return pd.Index([])
+        return pd.Index(pd.concat(columns, ignore_index=True).dropna().unique())
+
     def get_status(self):
         return { 
             'total_files': len(self.knowledge_base), 
@@ -68,6 +248,12 @@ class AIAssistant:
         try:
             logging.info(f"Kullanıcı '{user.id}' (Rol: {user.role}) sorgu yapıyor: '{query}'")
             
+            cache_key = (query.strip().lower(), user.role)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logging.info("Yanıt önbellekten döndürüldü.")
+                return cached
+            
             # YENİ EKLENEN: Matematik sorgularını önce kontrol et - GÜVENLİ
             try:
                 if self._is_math_query(query):
@@ -98,14 +284,39 @@ class AIAssistant:
 
             tool_to_use = self._select_tool(intent)
             if tool_to_use:
-                return tool_to_use(query, entities)
+                result = tool_to_use(query, entities)
+            else:
+                result = self._tool_summarize_context(query, entities)
             
-            return self._tool_summarize_context(query, entities)
+            # Web araması güncel sonuç döndürmeli, önbelleğe alınmaz; yedek yola düşen (Gemini hatası vb.) sonuçlar da
+            cacheable = result.pop("cacheable", True)
+            if cacheable and intent != 'web_search':
+                self._cache_put(cache_key, result)
+            return result
             
         except Exception as e:
             logging.error(f"Process query genel hatası: {e}", exc_info=True)
             return {"text": "Sorgu işlenirken bir hata oluştu. Lütfen daha basit bir soru deneyin.", "chart": None}
 
+    def _cache_get(self, key) -> Optional[Dict]:
+        """Süresi dolmamış önbellek kaydının kopyasını döndürür."""
+        with self._query_cache_lock:
+            entry = self._query_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > QUERY_CACHE_TTL:
+                del self._query_cache[key]
+                return None
+            self._query_cache.move_to_end(key)
+            return dict(entry[1])
+
+    def _cache_put(self, key, result: Dict):
+        with self._query_cache_lock:
+            self._query_cache[key] = (time.monotonic(), dict(result))
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+
     def _is_math_query(self, query: str) -> bool:
         """
         Sorgunun matematik sorusu olup olmadığını kontrol eder.
@@ -113,70 +324,21 @@ class AIAssistant:
         """
         try:
             query_lower = query.lower()
-            
-            # Matematik anahtar kelimeleri
-            math_keywords = [
-                # Temel işlemler
-                'kaç eder', 'hesapla', 'topla', 'çıkar', 'çarp', 'böl',
-                '+', '-', '*', '/', 'toplam', 'fark', 'çarpım', 'bölüm',
-                
-                # İstatistik - DAHA SPESİFİK
-                'ortalama maaş', 'medyan', 'maksimum', 'minimum', 'standart sapma',
-                'mean', 'median', 'max', 'min', 'std', 'average',
-                'en yüksek maaş', 'en düşük maaş', 'en büyük', 'en küçük',
-                
-                # Yüzde hesaplamaları
-                'yüzde', '%', 'artış', 'azalış', 'büyüme oranı', 'yüzde kaç',
-                'oranı', 'değişim', 'artış oranı', 'düşüş oranı',
-                
-                # Özel matematik sorguları
-                'kaç kat', 'kat', 'misli', 'çalışan sayısı', 'toplam çalışan',
-                'kaç çalışan', 'toplam.*çalışan'
-            ]
-            
-            # Pattern kontrolü
-            for keyword in math_keywords:
-                if keyword in query_lower:
-                    return True
-            
-            # Sayı + operatör kombinasyonu kontrolü (regex)
-            import re
-            math_patterns = [
-                r'\d+\s*[+\-*/]\s*\d+',  # 5 + 3, 100 * 12 gibi
-                r'\d+.*ile.*\d+',  # 5 ile 3 çarp gibi
-                r'.*maaş.*kaç kat.*',  # maaş kaç kat sorguları
-                r'toplam.*sayı.*'  # toplam sayı sorguları
-            ]
-            
-            for pattern in math_patterns:
-                if re.search(pattern, query_lower):
-                    return True
-            
-            # Sayı + matematik context kontrolü
-            has_numbers = bool(re.search(r'\d+', query))
-            has_math_context = any(word in query_lower for word in [
-                'maaş', 'ciro', 'satış', 'gelir', 'gider', 'kar', 'zarar',
-                'çalışan sayısı', 'toplam', 'ortalama', 'hesapla'
-            ])
-            
-            if has_numbers and has_math_context:
+            if not _MATH_TOKENS.isdisjoint(query_lower.split()):
                 return True
+            if not any(c.isdigit() for c in query):
+                return bool(_MATH_KEYWORDS_RE.search(query_lower))
             
-            return False
+            # Anahtar kelime, sayı + operatör pattern'ı ya da sayı + matematik bağlamı
+            return bool(_MATH_QUERY_RE.search(query_lower))
             
         except Exception as e:
             logging.error(f"Math query check hatası: {e}")
             return False
 
     def _select_tool(self, intent: str) -> Optional[callable]:
-        tool_map = {
-            "store_query": self._tool_get_store_data,
-            "individual_salary": self._tool_get_employee_data,
-            "list_all_employees": self._tool_get_employee_data,
-            "count_department_employees": self._tool_count_department_employees,
-            "web_search": self._tool_web_search
-        }
-        return tool_map.get(intent)
+        name = self._TOOL_NAMES.get(intent)
+        return getattr(self, name) if name else None
 
     # --- ARAÇLAR (TÜMÜ GÜNCELLENDİ) ---
     # Artık tüm araçlar ham DataFrame'ler (`self.structured_data`) üzerinden çalışır. Bu, tutarlılığı ve sağlamlığı artırır.
@@ -186,31 +348,27 @@ class AIAssistant:
         if not store_name:
             return {"text": "Lütfen hangi mağaza hakkında bilgi istediğinizi belirtin.", "chart": None}
             
-        for filename, df in self.structured_data.items():
-            store_col = next((c for c in df.columns if any(k in c.lower() for k in ['mağaza', 'store', 'şube'])), None)
-            if not store_col: continue
-
-            # Harf büyüklüğüne ve baştaki/sondaki boşluklara duyarsız arama
-            store_data_row = df[df[store_col].str.strip().str.lower() == store_name.lower()]
+        # Harf büyüklüğüne ve baştaki/sondaki boşluklara duyarsız arama
+        location = self._store_locator.get(store_name.casefold())
+        if location is not None:
+            filename, position = location
+            row = self.structured_data[filename].iloc[position]
+            text = f"**{store_name} Mağazası Verileri:**\n"
+            for key, value in row.items():
+                text += f"- {str(key)}: {value}\n"
+            
+            # Grafik verisi: ciro sütunları tek seferde temizlenip sayıya çevrilir,
+            # sayıya dönmeyen değerler atlanır
+            ciro_values = row[self._col_index[filename]['ciro_cols']].astype(str)
+            cleaned = pd.to_numeric(
+                ciro_values.str.replace(',', '', regex=False).str.replace(r'[^\d.]', '', regex=True),
+                errors='coerce'
+            ).dropna()
+            chart_data = {'labels': cleaned.index.tolist(), 'data': cleaned.to_numpy(dtype=float).tolist()}
             
-            if not store_data_row.empty:
-                data = store_data_row.iloc[0].to_dict()
-                text = f"**{store_name} Mağazası Verileri:**\n"
-                chart_data = {'labels': [], 'data': []}
-                for key, value in data.items():
-                    text += f"- {str(key)}: {value}\n"
-                    # Grafik verisi hazırlama (sağlamlaştırıldı)
-                    if isinstance(key, str) and 'ciro' in key.lower():
-                        try:
-                            clean_value_str = re.sub(r'[^\d.]', '', str(value).replace(',', ''))
-                            if clean_value_str:
-                                chart_data['labels'].append(key)
-                                chart_data['data'].append(float(clean_value_str))
-                        except (ValueError, TypeError): continue
-                
-                chart = {'type': 'bar', 'title': f'{store_name} Ciro Bilgileri', 'data': chart_data} if chart_data['labels'] else None
-                return {"text": text, "chart": chart}
-                
+            chart = {'type': 'bar', 'title': f'{store_name} Ciro Bilgileri', 'data': chart_data} if chart_data['labels'] else None
+            return {"text": text, "chart": chart}
+        
         return {"text": f"'{store_name}' adlı mağaza için veri bulunamadı.", "chart": None}
     
     def _tool_count_department_employees(self, query: str, entities: Dict) -> Dict:
@@ -219,15 +377,12 @@ class AIAssistant:
             return {"text": "Hangi departmanı saymamı istediğinizi anlayamadım.", "chart": None}
         
         total_employees = set()
-        for df in self.structured_data.values():
-            dept_col = next((c for c in df.columns if 'departman' in c.lower()), None)
-            emp_col = next((c for c in df.columns if 'ad soyad' in c.lower()), None)
-            if not (dept_col and emp_col): continue
-            
+        needle = department_name.casefold()
+        for members in self._department_members.values():
             # GÜNCELLENDİ: Daha esnek arama. 'bilgi işlem' sorgusu, 'Bilgi İşlem Departmanı'nı bulur.
-            dept_employees = df[df[dept_col].str.lower().str.contains(department_name.lower(), na=False)]
-            if not dept_employees.empty:
-                total_employees.update(dept_employees[emp_col].dropna().unique())
+            for dept_key, names in members.items():
+                if needle in dept_key:
+                    total_employees.update(names)
 
         count = len(total_employees)
         if count > 0:
@@ -239,55 +394,60 @@ class AIAssistant:
         employee_name = entities['entities'].get('employees', [None])[0]
         if not employee_name:
             # Tüm çalışanları listeleme
-            all_employees = set()
-            for df in self.structured_data.values():
-                emp_col = next((c for c in df.columns if 'ad soyad' in c.lower()), None)
-                if emp_col: all_employees.update(df[emp_col].dropna().unique())
-            if not all_employees: return {"text": "Sistemde çalışan verisi bulunamadı.", "chart": None}
-            text = f"Toplam **{len(all_employees)}** çalışan bulundu:\n- " + "\n- ".join(sorted(list(all_employees)))
-            return {"text": text, "chart": None}
+            if self._employee_list_text is None: return {"text": "Sistemde çalışan verisi bulunamadı.", "chart": None}
+            return {"text": self._employee_list_text, "chart": None}
 
         # Tek bir çalışanı arama
-        for df in self.structured_data.values():
-            emp_col = next((c for c in df.columns if 'ad soyad' in c.lower()), None)
-            if not emp_col: continue
-            
-            emp_data_row = df[df[emp_col].str.strip().str.lower() == employee_name.lower()]
-            if not emp_data_row.empty:
-                data = emp_data_row.iloc[0].to_dict()
-                text = f"**{employee_name} Çalışan Bilgileri:**\n"
-                for key, value in data.items(): text += f"- {str(key)}: {value}\n"
-                return {"text": text, "chart": None}
-                
+        location = self._employee_locator.get(employee_name.casefold())
+        if location is not None:
+            filename, position = location
+            data = self.structured_data[filename].iloc[position].to_dict()
+            text = f"**{employee_name} Çalışan Bilgileri:**\n"
+            for key, value in data.items(): text += f"- {str(key)}: {value}\n"
+            return {"text": text, "chart": None}
+        
         return {"text": f"'{employee_name}' adlı çalışan için veri bulunamadı.", "chart": None}
 
     def _tool_summarize_context(self, query: str, entities: Dict) -> Dict:
         relevant_chunks = self.knowledge_proc.search(query, k=SIMILARITY_SEARCH_K)
         if not relevant_chunks or "henüz oluşturulmadı" in relevant_chunks[0]:
-            return self._tool_web_search(query, entities)
+            return self._fallback_web_search(query, entities)
 
         context = "\n\n".join(relevant_chunks)[:CONTEXT_MAX_LENGTH]
         prompt = f"Aşağıdaki bağlamı kullanarak soruya kısa ve net bir Türkçe cevap ver.\n\nBağlam:\n---\n{context}\n---\n\nSoru: {query}\n\nCevap:"
         payload = {"contents": [{"parts": [{"text": prompt}]}]}
         headers = {'Content-Type': 'application/json'}
+        # Gemini hata verirse beklemeden kullanılabilsin diye web araması önden başlatılır (SPECULATIVE_WEB_SEARCH=1).
+        # Başlamış bir arama iptal edilemez; yani her cevapta ücretli bir SerpAPI isteği gider.
+        fallback = None
+        if SPECULATIVE_WEB_SEARCH and SERPAPI_API_KEY:
+            fallback = self._api_pool.submit(self._tool_web_search, query, entities)
         try:
-            response = requests.post(GENERATIVE_MODEL_API_URL, headers=headers, json=payload, timeout=30)
+            response = self._http.post(GENERATIVE_MODEL_API_URL, headers=headers, data=orjson.dumps(payload), timeout=30)
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             answer = result['candidates'][0]['content']['parts'][0]['text'].strip()
+            if fallback is not None:
+                fallback.cancel()
             return {"text": answer, "chart": None}
         except Exception as e:
             logging.error(f"Gemini API hatası: {e}. Web aramasına yönlendiriliyor.")
-            return self._tool_web_search(query, entities)
+            if fallback is not None:
+                return {**fallback.result(), "cacheable": False}
+            return self._fallback_web_search(query, entities)
+
+    def _fallback_web_search(self, query: str, entities: Dict) -> Dict:
+        """Yedek web araması; geçici hatalar önbellekte kalmasın diye sonuç önbelleğe alınmaz."""
+        return {**self._tool_web_search(query, entities), "cacheable": False}
 
     def _tool_web_search(self, query: str, entities: Dict) -> Dict:
         if not SERPAPI_API_KEY:
             return {"text": "Web araması için API anahtarı yapılandırılmamış.", "chart": None}
         try:
             params = {"q": query, "api_key": SERPAPI_API_KEY, "hl": "tr", "gl": "tr"}
-            response = requests.get("https://serpapi.com/search", params=params, timeout=10)
+            response = self._http.get("https://serpapi.com/search", params=params, timeout=10)
             response.raise_for_status()
-            results = response.json().get("organic_results", [])
+            results = orjson.loads(response.content).get("organic_results", [])
             if not results: return {"text": f"'{query}' için internette sonuç bulunamadı.", "chart": None}
             snippets = [f"**{r.get('title', '')}**\n{r.get('snippet', '')}" for r in results[:3] if r.get('snippet')]
             answer = "\n\n".join(snippets)
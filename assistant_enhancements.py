@@ -22,8 +22,19 @@ except ImportError:
             self.new_processor = None
             self.analytics_engine = None
             self.smart_intent = None
+        
+        # Durum endpoint'i için bileşen adı -> özellik adı (özellikler her zaman tanımlı)
+        self._component_registry = {
+            'enhanced_processor': 'new_processor',
+            'analytics_engine': 'analytics_engine',
+            'smart_intent': 'smart_intent'
+        }
 
 # 3. Yeni metodlar ekle (AIAssistant sınıfına):
+    def get_data_files(self) -> List[str]:
+        """Yüklü veri dosyası adları (her çağrıda yeni liste; O(dosya sayısı))"""
+        return list(self.structured_data)
+    
     def _handle_advanced_analytics(self, query: str, entities: Dict) -> Dict:
         """Gelişmiş analitik sorgular - YENİ METOD"""
         
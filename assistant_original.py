@@ -5,12 +5,18 @@ Veri yÃ¼kleme, iÅŸleme, sorgu anlama ve cevap Ã¼retme iÅŸlemlerini yÃ¶
 GÃœNCELLEME: Mathematics Engine entegrasyonu eklendi.
 YENİ: Advanced Analytics ve Smart Intent entegrasyonu
 """
+import importlib
+import importlib.util
 import logging
 import re
-import requests
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import pandas as pd
+import numpy as np
+
+if TYPE_CHECKING:  # pandas yalnızca tip ipuçları için; veri katmanı zaten kendi içinde yükler
+    import pandas as pd
 
 from auth import User
 from config import (DATA_DIRECTORY, GENERATIVE_MODEL_API_URL, SERPAPI_API_KEY,
@@ -20,16 +26,110 @@ from knowledge_processor import KnowledgeProcessor
 from nlp_processor import SmartNLPProcessor
 from mathematics_engine import MathematicsEngine
 
-# Gelişmiş özellikler import - YENİ EKLENEN
-try:
-    from new_data_processor import NewDataProcessor
-    from advanced_analytics_engine import AdvancedAnalyticsEngine
-    from smart_intent_engine import SmartIntentEngine
-    ADVANCED_FEATURES = True
-except ImportError:
-    ADVANCED_FEATURES = False
+# Başlangıçta AI hafızası ve isim toplama işlerini paralel yürüten iş parçacığı sayısı
+INIT_WORKERS = 4
+
+# Gelişmiş özellikler - YENİ EKLENEN
+# Motor adı -> (modül, sınıf). Modüllerin varlığı find_spec ile kontrol edilir;
+# asıl import (ve sklearn vb. bağımlılıkları) motor ilk kullanıldığında yapılır.
+ADVANCED_ENGINES = {
+    'new_processor': ('new_data_processor', 'NewDataProcessor'),
+    'analytics_engine': ('advanced_analytics_engine', 'AdvancedAnalyticsEngine'),
+    'smart_intent': ('smart_intent_engine', 'SmartIntentEngine'),
+}
+ADVANCED_FEATURES = all(importlib.util.find_spec(module) is not None for module, _ in ADVANCED_ENGINES.values())
+if not ADVANCED_FEATURES:
     logging.warning("Gelişmiş özellikler bulunamadı")
 
+# Sorgu yönlendirme anahtar kelimeleri: her küme modül yüklenirken tek bir alternation regex'ine derlenir
+ADVANCED_KEYWORDS = [
+    'anomali', 'aykırı', 'trend', 'tahmin', 'segmentasyon', 'segment',
+    'korelasyon', 'analiz', 'rapor', 'öneri', 'aksiyon', 'insight',
+    'kapsamlı', 'detaylı', 'gelişmiş'
+]
+SALES_DATA_KEYWORDS = ['ciro', 'satış', 'mağaza', 'büyüme']
+HR_DATA_KEYWORDS = ['maaş', 'çalışan', 'departman']
+
+_ADVANCED_RE = re.compile('|'.join(map(re.escape, ADVANCED_KEYWORDS)))
+_SALES_DATA_RE = re.compile('|'.join(map(re.escape, SALES_DATA_KEYWORDS)))
+_HR_DATA_RE = re.compile('|'.join(map(re.escape, HR_DATA_KEYWORDS)))
+
+# Gelişmiş analitik alt niyeti -> yanıt biçimlendirici (sıra önceliktir: anomali > trend > segment > öneri)
+SUB_INTENT_FORMATTERS = {
+    'anomaly': '_format_anomaly_response',
+    'trend': '_format_trend_response',
+    'segment': '_format_segmentation_response',
+    'rec': '_format_recommendations_response',
+}
+_SUB_INTENT_RE = re.compile(
+    r'(?P<anomaly>anomali|aykırı)|(?P<trend>trend|tahmin)|'
+    r'(?P<segment>segmentasyon|segment)|(?P<rec>öneri|aksiyon)'
+)
+
+# Matematik sorgusu ön kontrolü: bunlardan hiçbiri yoksa sorgu küçültülmeden/ayrıştırılmadan elenir
+_MATH_PROBE = re.compile(r'[\d+\-*/=^]|topla|ç[ıi]kar|böl|çarp|ortalama|yüzde', re.IGNORECASE)
+
+# Sayı biçimlendirme: binlik ayırıcı nokta, ondalık ayırıcı virgül (1.234.567,89)
+_TR_NUMBER_TABLE = str.maketrans(',.', '.,')
+
+def _fmt(value: float, decimals: int = 2, sign: bool = False) -> str:
+    """Sayıyı Türkçe gösterimle biçimlendirir; format + tek translate geçişi."""
+    return f"{value:{'+' if sign else ''},.{decimals}f}".translate(_TR_NUMBER_TABLE)
+
+# Rapor satırlarında kullanılan simgeler (her satırda yeniden sözlük kurulmaz)
+SEVERITY_EMOJI = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}
+PRIORITY_EMOJI = SEVERITY_EMOJI
+DIRECTION_EMOJI = {'upward': '📈', 'downward': '📉', 'stable': '➡️'}
+
+# Kapsamlı analiz raporu şablonu; bölüm yer tutucuları boş olabilir (bkz. _section)
+COMPREHENSIVE_TEMPLATE = """
+**🔍 Kapsamlı Veri Analizi Raporu**
+
+**📊 Temel Metrikler:**
+- Veri Kalitesi: %{data_quality_score:.1f}
+- Toplam Kayıt: {total_rows}
+- Sayısal Sütun: {numeric_columns}
+
+**💡 Kritik İçgörüler:**
+{critical_section}{warning_section}{anomaly_section}{forecast_section}{recommendation_section}"""
+
+def _section(title: str, lines) -> str:
+    """Başlık + satırlardan oluşan rapor bölümü; satır yoksa boş metin."""
+    body = "".join(lines)
+    return f"\n{title}\n{body}" if body else ""
+
+# Sütun rolü -> sütun adında aranan anahtar kelimeler
+COLUMN_ROLE_KEYWORDS = {
+    'store': ('maÄŸaza', 'store', 'ÅŸube'),
+    'employee': ('ad soyad', 'Ã§alÄ±ÅŸan'),
+}
+
+# Dosya türü -> dosya adında aranan anahtar kelimeler (her tür için ilk eşleşen dosya kullanılır)
+FILE_KIND_KEYWORDS = {
+    'sales': ('sales', 'satış'),
+    'hr': ('calisanlar', 'hr'),
+}
+
+def _index_files_by_kind(structured_data: Dict) -> Dict[str, Tuple[str, 'pd.DataFrame']]:
+    """Dosyaları yükleme sırasında bir kez türlerine göre sınıflandırır."""
+    by_kind = {}
+    for filename, df in structured_data.items():
+        name_lower = filename.lower()
+        for kind, keywords in FILE_KIND_KEYWORDS.items():
+            if kind not in by_kind and any(k in name_lower for k in keywords):
+                by_kind[kind] = (filename, df)
+    return by_kind
+
+def _detect_columns(df) -> Dict[str, Optional[str]]:
+    """Her rol için anahtar kelimesi geçen ilk sütunu tek geçişte bulur (sütun adı bir kez küçültülür)."""
+    found: Dict[str, Optional[str]] = dict.fromkeys(COLUMN_ROLE_KEYWORDS)
+    for col in df.columns:
+        col_lower = col.lower()
+        for role, keywords in COLUMN_ROLE_KEYWORDS.items():
+            if found[role] is None and any(k in col_lower for k in keywords):
+                found[role] = col
+    return found
+
 class AIAssistant:
     def __init__(self):
         logging.info(f"AI Assistant beyni baÅŸlatÄ±lÄ±yor...")
@@ -39,82 +139,138 @@ class AIAssistant:
         self.math_engine = MathematicsEngine()
         
         # Gelişmiş özellikler - YENİ EKLENEN
+        # Motorlar ilk kullanıldıkları anda import edilip oluşturulur (bkz. _get_engine)
+        self._engines: Dict[str, Optional[object]] = {}
         if ADVANCED_FEATURES:
-            self.new_processor = NewDataProcessor()
-            self.analytics_engine = AdvancedAnalyticsEngine()
-            self.smart_intent = SmartIntentEngine()
             logging.info("Tüm gelişmiş özellikler aktif")
-        else:
-            self.new_processor = None
-            self.analytics_engine = None
-            self.smart_intent = None
+        
+        # Durum endpoint'i için bileşen adı -> motor adı (bkz. _engine_status)
+        self._component_registry = {
+            'enhanced_processor': 'new_processor',
+            'analytics_engine': 'analytics_engine',
+            'smart_intent': 'smart_intent'
+        }
         
         self.knowledge_base: Dict[str, any] = {}
         self.structured_data: Dict[str, pd.DataFrame] = {}
         self.data_insights: Dict[str, Dict] = {}
-        self._initialize_system()
+        self._col_index: Dict[str, Dict[str, Optional[str]]] = {}
+        self._df_by_kind: Dict[str, Tuple[str, 'pd.DataFrame']] = {}
+        # Veri yükleme ve AI hafızası arka planda kurulur; hazır olana kadar sorgular "yükleniyor" yanıtı alır
+        self._ready = threading.Event()
+        threading.Thread(target=self._initialize_system, name='assistant-init', daemon=True).start()
 
     def _initialize_system(self):
         """Sistemi baÅŸlatÄ±r, tÃ¼m verileri yÃ¼kler ve iÅŸler."""
-        logging.info(f"'{DATA_DIRECTORY}' klasÃ¶rÃ¼nden veriler yÃ¼kleniyor...")
-        self.knowledge_base, self.structured_data, self.data_insights = self.data_loader.load_all_data(DATA_DIRECTORY)
-        
-        if not self.knowledge_base:
-            logging.warning("HiÃ§bir veri yÃ¼klenemedi. Asistan sÄ±nÄ±rlÄ± modda Ã§alÄ±ÅŸacak.")
-            return
+        try:
+            logging.info(f"'{DATA_DIRECTORY}' klasÃ¶rÃ¼nden veriler yÃ¼kleniyor...")
+            self.knowledge_base, self.structured_data, self.data_insights = self.data_loader.load_all_data(DATA_DIRECTORY)
+            # Mağaza/çalışan sütunları dosya başına bir kez bulunur
+            self._col_index = {filename: _detect_columns(df) for filename, df in self.structured_data.items()}
+            self._df_by_kind = _index_files_by_kind(self.structured_data)
+            
+            if not self.knowledge_base:
+                logging.warning("HiÃ§bir veri yÃ¼klenemedi. Asistan sÄ±nÄ±rlÄ± modda Ã§alÄ±ÅŸacak.")
+                return
 
-        logging.info(f"Toplam {len(self.knowledge_base)} dosya yÃ¼klendi. AI hafÄ±zasÄ± oluÅŸturuluyor...")
-        self.knowledge_proc.process_knowledge_base(self.knowledge_base)
+            logging.info(f"Toplam {len(self.knowledge_base)} dosya yÃ¼klendi. AI hafÄ±zasÄ± oluÅŸturuluyor...")
+            # AI hafızası ve dosya başına isim toplama birbirinden bağımsız; aynı havuzda paralel çalışır
+            all_store_names = set()
+            all_employee_names = set()
+            with ThreadPoolExecutor(max_workers=INIT_WORKERS, thread_name_prefix='assistant-init') as pool:
+                knowledge_future = pool.submit(self.knowledge_proc.process_knowledge_base, self.knowledge_base)
+                name_futures = [pool.submit(self._collect_names, filename, cols)
+                                for filename, cols in self._col_index.items()]
+                for future in as_completed(name_futures):
+                    store_names, employee_names = future.result()
+                    all_store_names |= store_names
+                    all_employee_names |= employee_names
+                knowledge_future.result()
 
-        all_store_names = set()
-        all_employee_names = set()
-        for df in self.structured_data.values():
-            store_col = next((c for c in df.columns if any(k in c.lower() for k in ['maÄŸaza', 'store', 'ÅŸube'])), None)
-            emp_col = next((c for c in df.columns if any(k in c.lower() for k in ['ad soyad', 'Ã§alÄ±ÅŸan'])), None)
-            if store_col: all_store_names.update(df[store_col].dropna().unique())
-            if emp_col: all_employee_names.update(df[emp_col].dropna().unique())
+            self.nlp_proc.add_store_names(list(all_store_names))
+            self.nlp_proc.add_employee_names(list(all_employee_names))
+            logging.info("AI Assistant baÅŸlatma iÅŸlemi tamamlandÄ± ve hazÄ±r.")
+        except Exception as e:
+            logging.error(f"AI Assistant baÅŸlatma hatasÄ±: {e}", exc_info=True)
+        finally:
+            self._ready.set()
+
+    def _collect_names(self, filename: str, cols: Dict[str, Optional[str]]) -> Tuple[set, set]:
+        """Bir dosyadaki benzersiz mağaza ve çalışan adları."""
+        df = self.structured_data[filename]
+        store_names = set(df[cols['store']].dropna().unique()) if cols['store'] else set()
+        employee_names = set(df[cols['employee']].dropna().unique()) if cols['employee'] else set()
+        return store_names, employee_names
+
+    def _get_engine(self, name: str):
+        """Gelişmiş özellik motorunu ilk çağrıda import edip oluşturur; özellikler yoksa None döndürür."""
+        if not ADVANCED_FEATURES:
+            return None
+        if name not in self._engines:
+            module_name, class_name = ADVANCED_ENGINES[name]
+            try:
+                engine_cls = getattr(importlib.import_module(module_name), class_name)
+                self._engines[name] = engine_cls()
+            except ImportError as e:
+                # Modül bulundu ama bağımlılıklarından biri eksik; tekrar denenmez
+                logging.warning(f"{module_name} yüklenemedi: {e}")
+                self._engines[name] = None
+        return self._engines[name]
 
-        self.nlp_proc.add_store_names(list(all_store_names))
-        self.nlp_proc.add_employee_names(list(all_employee_names))
-        logging.info("AI Assistant baÅŸlatma iÅŸlemi tamamlandÄ± ve hazÄ±r.")
+    @property
+    def new_processor(self):
+        return self._get_engine('new_processor')
 
+    @property
+    def analytics_engine(self):
+        return self._get_engine('analytics_engine')
+
+    @property
+    def smart_intent(self):
+        return self._get_engine('smart_intent')
+
+    def get_data_files(self) -> List[str]:
+        """Yüklü veri dosyası adları (her çağrıda yeni liste; O(dosya sayısı))"""
+        return list(self.structured_data)
+    
     def get_status(self):
         """Sistem durumu - YENİ EKLENEN"""
         return { 
+            'ready': self._ready.is_set(),
             'total_files': len(self.knowledge_base), 
             'ai_memory_ready': self.knowledge_proc.is_ready(),
             'math_engine_ready': True,
-            'enhanced_processor': self.new_processor is not None,
-            'analytics_engine': self.analytics_engine is not None,
-            'smart_intent': self.smart_intent is not None,
+            **{component: self._engine_status(name) for component, name in self._component_registry.items()},
             'advanced_features_active': ADVANCED_FEATURES
         }
 
-    def _handle_advanced_analytics(self, query: str, entities: Dict) -> Dict:
+    def _engine_status(self, name: str) -> Optional[bool]:
+        """
+        Motorun durumu (motoru oluşturmaz): yüklendiyse True, import/oluşturma başarısızsa ya da modül yoksa False,
+        henüz ilk kullanımı gelmediyse None.
+        """
+        if not ADVANCED_FEATURES:
+            return False
+        if name not in self._engines:
+            return None
+        return self._engines[name] is not None
+
+    def _handle_advanced_analytics(self, query: str, entities: Dict, query_lower: Optional[str] = None) -> Dict:
         """Gelişmiş analitik sorgular - YENİ METOD"""
+        if query_lower is None:
+            query_lower = query.lower()
         
         if not self.analytics_engine:
             return {"text": "Gelişmiş analitik özellikler şu anda kullanılamıyor.", "chart": None}
         
-        # Dosya seç
-        target_file = None
-        target_df = None
-        
-        # Sales verisi mi?
-        if any(word in query.lower() for word in ['ciro', 'satış', 'mağaza', 'büyüme']):
-            for filename, df in self.structured_data.items():
-                if 'sales' in filename.lower():
-                    target_file = filename
-                    target_df = df
-                    break
-        
-        # HR verisi mi?
-        elif any(word in query.lower() for word in ['maaş', 'çalışan', 'departman']):
-            for filename, df in self.structured_data.items():
-                if 'calisanlar' in filename.lower() or 'hr' in filename.lower():
-                    target_file = filename
-                    target_df = df
-                    break
+        # Dosya seç: Sales verisi mi, HR verisi mi?
+        if _SALES_DATA_RE.search(query_lower):
+            kind = 'sales'
+        elif _HR_DATA_RE.search(query_lower):
+            kind = 'hr'
+        else:
+            kind = None
+        target_file, target_df = self._df_by_kind.get(kind, (None, None))
         
         if target_df is None:
             return {"text": "İlgili veri dosyası bulunamadı.", "chart": None}
@@ -122,69 +278,48 @@ class AIAssistant:
         # Gelişmiş analiz yap
         analysis = self.analytics_engine.comprehensive_analysis(target_df, target_file)
         
-        # Sorgu tipine göre yanıt oluştur
-        query_lower = query.lower()
-        
-        if 'anomali' in query_lower or 'aykırı' in query_lower:
-            return self._format_anomaly_response(analysis)
-        elif 'trend' in query_lower or 'tahmin' in query_lower:
-            return self._format_trend_response(analysis)
-        elif 'segmentasyon' in query_lower or 'segment' in query_lower:
-            return self._format_segmentation_response(analysis)
-        elif 'öneri' in query_lower or 'aksiyon' in query_lower:
-            return self._format_recommendations_response(analysis)
-        else:
-            return self._format_comprehensive_response(analysis)
+        # Sorgu tipine göre yanıt oluştur: tek regex taramasında bulunan alt niyetlerden en öncelikli olanı seçilir
+        found = {m.lastgroup for m in _SUB_INTENT_RE.finditer(query_lower)}
+        formatter = next((name for sub_intent, name in SUB_INTENT_FORMATTERS.items() if sub_intent in found),
+                         '_format_comprehensive_response')
+        return getattr(self, formatter)(analysis)
     
     def _format_comprehensive_response(self, analysis: Dict) -> Dict:
         """Kapsamlı analiz yanıtı formatla - YENİ METOD"""
         
-        response = f"""
-**🔍 Kapsamlı Veri Analizi Raporu**
-
-**📊 Temel Metrikler:**
-- Veri Kalitesi: %{analysis['basic_stats']['data_quality_score']:.1f}
-- Toplam Kayıt: {analysis['basic_stats']['total_rows']}
-- Sayısal Sütun: {len(analysis['basic_stats']['numeric_columns'])}
-
-**💡 Kritik İçgörüler:**
-"""
-        
         # İş içgörüleri
-        critical_insights = [i for i in analysis['business_insights'] if i.get('severity') == 'critical']
-        warning_insights = [i for i in analysis['business_insights'] if i.get('severity') == 'warning']
-        
-        if critical_insights:
-            response += f"\n🔴 **Kritik Durumlar:**\n"
-            for insight in critical_insights[:3]:
-                response += f"- {insight['title']}: {insight['value']}\n"
-                response += f"  {insight['description']}\n"
-        
-        if warning_insights:
-            response += f"\n🟡 **Dikkat Gereken Alanlar:**\n"
-            for insight in warning_insights[:2]:
-                response += f"- {insight['title']}: {insight['value']}\n"
-        
-        # Anomaliler
-        if analysis['anomaly_detection']:
-            response += f"\n🔍 **Tespit Edilen Anomaliler:**\n"
-            for anomaly in analysis['anomaly_detection'][:3]:
-                response += f"- {anomaly['column']}: {anomaly['count']} aykırı değer\n"
-        
-        # Tahminler
-        if analysis['forecasting']['forecasts']:
-            response += f"\n🔮 **Gelecek Projeksiyonları:**\n"
-            for forecast in analysis['forecasting']['forecasts']:
-                change = forecast['forecast_value'] - forecast['current_value']
-                response += f"- {forecast['metric']}: {change:+,.0f} ({forecast['growth_rate']:+.1f}%)\n".replace(',', '.')
-        
-        # Öneriler
-        if analysis['recommendations']:
-            response += f"\n🎯 **Aksiyon Önerileri:**\n"
-            for rec in analysis['recommendations'][:3]:
-                response += f"- {rec['title']}: {rec['description']}\n"
-        
-        return {"text": response, "chart": None}
+        # İçgörüler tek geçişte önem derecesine göre gruplanır
+        by_severity: Dict[str, List[Dict]] = {'critical': [], 'warning': []}
+        for insight in analysis['business_insights']:
+            bucket = by_severity.get(insight.get('severity'))
+            if bucket is not None:
+                bucket.append(insight)
+        
+        # Tahmin farkları tüm metrikler için tek vektör işlemiyle hesaplanır
+        forecasts = analysis['forecasting']['forecasts']
+        changes = (np.array([f['forecast_value'] for f in forecasts], dtype=float)
+                   - np.array([f['current_value'] for f in forecasts], dtype=float)).tolist()
+        
+        # Değişken uzunluktaki bölümler önce birleştirilir, sonra şablona tek seferde yerleştirilir
+        basic_stats = analysis['basic_stats']
+        text = COMPREHENSIVE_TEMPLATE.format_map({
+            'data_quality_score': basic_stats['data_quality_score'],
+            'total_rows': basic_stats['total_rows'],
+            'numeric_columns': len(basic_stats['numeric_columns']),
+            'critical_section': _section("🔴 **Kritik Durumlar:**", (
+                f"- {i['title']}: {i['value']}\n  {i['description']}\n" for i in by_severity['critical'][:3])),
+            'warning_section': _section("🟡 **Dikkat Gereken Alanlar:**", (
+                f"- {i['title']}: {i['value']}\n" for i in by_severity['warning'][:2])),
+            'anomaly_section': _section("🔍 **Tespit Edilen Anomaliler:**", (
+                f"- {a['column']}: {a['count']} aykırı değer\n" for a in analysis['anomaly_detection'][:3])),
+            'forecast_section': _section("🔮 **Gelecek Projeksiyonları:**", (
+                f"- {f['metric']}: {_fmt(change, 0, sign=True)} ({_fmt(f['growth_rate'], 1, sign=True)}%)\n"
+                for f, change in zip(forecasts, changes))),
+            'recommendation_section': _section("🎯 **Aksiyon Önerileri:**", (
+                f"- {r['title']}: {r['description']}\n" for r in analysis['recommendations'][:3])),
+        })
+        
+        return {"text": text, "chart": None}
     
     def _format_anomaly_response(self, analysis: Dict) -> Dict:
         """Anomali analiz yanıtı - YENİ METOD"""
@@ -194,16 +329,16 @@ class AIAssistant:
         if not anomalies:
             return {"text": "🟢 Verilerde önemli anomali tespit edilmedi.", "chart": None}
         
-        response = "🔍 **Anomali Tespiti Raporu**\n\n"
+        parts = ["🔍 **Anomali Tespiti Raporu**\n\n"]
         
         for anomaly in anomalies:
-            severity_emoji = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}.get(anomaly['severity'], '⚪')
-            response += f"{severity_emoji} **{anomaly['column']}**\n"
-            response += f"- Aykırı değer sayısı: {anomaly['count']}\n"
-            response += f"- Toplam verinin %{anomaly['percentage']:.1f}'si\n"
-            response += f"- Örnek değerler: {anomaly['values'][:3]}\n\n"
+            severity_emoji = SEVERITY_EMOJI.get(anomaly['severity'], '⚪')
+            parts.append(f"{severity_emoji} **{anomaly['column']}**\n")
+            parts.append(f"- Aykırı değer sayısı: {anomaly['count']}\n")
+            parts.append(f"- Toplam verinin %{anomaly['percentage']:.1f}'si\n")
+            parts.append(f"- Örnek değerler: {anomaly['values'][:3]}\n\n")
         
-        return {"text": response, "chart": None}
+        return {"text": "".join(parts), "chart": None}
     
     def _format_trend_response(self, analysis: Dict) -> Dict:
         """Trend analiz yanıtı - YENİ METOD"""
@@ -211,24 +346,24 @@ class AIAssistant:
         trends = analysis['trend_analysis']['trends']
         forecasts = analysis['forecasting']['forecasts']
         
-        response = "📈 **Trend ve Tahmin Analizi**\n\n"
+        parts = ["📈 **Trend ve Tahmin Analizi**\n\n"]
         
         if trends:
             for trend in trends:
-                direction_emoji = {'upward': '📈', 'downward': '📉', 'stable': '➡️'}.get(trend['direction'], '📊')
-                response += f"{direction_emoji} **{trend['metric']}**\n"
-                response += f"- Yön: {trend['direction']}\n"
-                response += f"- Değişim: {trend['change_amount']:+,.0f}\n"
-                response += f"- Yüzde: {trend['change_percentage']:+.1f}%\n\n".replace(',', '.')
+                direction_emoji = DIRECTION_EMOJI.get(trend['direction'], '📊')
+                parts.append(f"{direction_emoji} **{trend['metric']}**\n")
+                parts.append(f"- Yön: {trend['direction']}\n")
+                parts.append(f"- Değişim: {_fmt(trend['change_amount'], 0, sign=True)}\n")
+                parts.append(f"- Yüzde: {_fmt(trend['change_percentage'], 1, sign=True)}%\n\n")
         
         if forecasts:
-            response += "🔮 **Gelecek Tahminleri:**\n"
+            parts.append("🔮 **Gelecek Tahminleri:**\n")
             for forecast in forecasts:
-                response += f"- Mevcut: {forecast['current_value']:,.0f}\n".replace(',', '.')
-                response += f"- Tahmin: {forecast['forecast_value']:,.0f}\n".replace(',', '.')
-                response += f"- Büyüme: %{forecast['growth_rate']:+.1f}\n"
+                parts.append(f"- Mevcut: {_fmt(forecast['current_value'], 0)}\n")
+                parts.append(f"- Tahmin: {_fmt(forecast['forecast_value'], 0)}\n")
+                parts.append(f"- Büyüme: %{forecast['growth_rate']:+.1f}\n")
         
-        return {"text": response, "chart": None}
+        return {"text": "".join(parts), "chart": None}
     
     def _format_recommendations_response(self, analysis: Dict) -> Dict:
         """Öneri yanıtı - YENİ METOD"""
@@ -238,18 +373,18 @@ class AIAssistant:
         if not recommendations:
             return {"text": "✅ Şu anda özel aksiyon gerektirecek durum tespit edilmedi.", "chart": None}
         
-        response = "🎯 **Aksiyon Önerileri Raporu**\n\n"
+        parts = ["🎯 **Aksiyon Önerileri Raporu**\n\n"]
         
         for rec in recommendations:
-            priority_emoji = {'high': '🔴', 'medium': '🟡', 'low': '🟢'}.get(rec['priority'], '⚪')
-            response += f"{priority_emoji} **{rec['title']}** (Öncelik: {rec['priority']})\n"
-            response += f"{rec['description']}\n\n"
-            response += "**Aksiyon Adımları:**\n"
+            priority_emoji = PRIORITY_EMOJI.get(rec['priority'], '⚪')
+            parts.append(f"{priority_emoji} **{rec['title']}** (Öncelik: {rec['priority']})\n")
+            parts.append(f"{rec['description']}\n\n")
+            parts.append("**Aksiyon Adımları:**\n")
             for i, action in enumerate(rec['action_items'], 1):
-                response += f"{i}. {action}\n"
-            response += "\n"
+                parts.append(f"{i}. {action}\n")
+            parts.append("\n")
         
-        return {"text": response, "chart": None}
+        return {"text": "".join(parts), "chart": None}
     
     def _format_segmentation_response(self, analysis: Dict) -> Dict:
         """Segmentasyon yanıtı - YENİ METOD"""
@@ -259,70 +394,90 @@ class AIAssistant:
         if not segmentation['segments']:
             return {"text": "📊 Anlamlı segment oluşturmak için yeterli veri yok.", "chart": None}
         
-        response = f"🎯 **Segmentasyon Analizi** ({segmentation['method']})\n\n"
+        parts = [f"🎯 **Segmentasyon Analizi** ({segmentation['method']})\n\n"]
         
         for segment in segmentation['segments']:
-            response += f"**Segment {segment['segment_id'] + 1}** ({segment['size']} kayıt, %{segment['percentage']:.1f})\n"
+            parts.append(f"**Segment {segment['segment_id'] + 1}** ({segment['size']} kayıt, %{segment['percentage']:.1f})\n")
             
             # Segment özelliklerini göster
             for metric, values in segment['characteristics'].items():
-                response += f"- {metric}: Ort. {values['mean']:.0f}\n"
-            response += "\n"
+                parts.append(f"- {metric}: Ort. {values['mean']:.0f}\n")
+            parts.append("\n")
         
-        return {"text": response, "chart": None}
+        return {"text": "".join(parts), "chart": None}
     
-    def _needs_advanced_analytics(self, query: str) -> bool:
-        """Gelişmiş analitik gerekli mi? - YENİ METOD"""
-        
-        advanced_keywords = [
-            'anomali', 'aykırı', 'trend', 'tahmin', 'segmentasyon', 'segment',
-            'korelasyon', 'analiz', 'rapor', 'öneri', 'aksiyon', 'insight',
-            'kapsamlı', 'detaylı', 'gelişmiş'
-        ]
-        
-        return any(keyword in query.lower() for keyword in advanced_keywords)
+    def _needs_advanced_analytics(self, query_lower: str) -> bool:
+        """Gelişmiş analitik gerekli mi? (küçük harfe çevrilmiş sorgu alır) - YENİ METOD"""
+        return bool(_ADVANCED_RE.search(query_lower))
+
+    # Maaş verisine erişim yalnızca admin rolüne açık olan niyetler
+    _ADMIN_INTENTS = frozenset({'individual_salary', 'salary_analysis'})
+
+    # Erken yönlendirme adımları (sıra önceliği belirler): her adım yanıt dict'i ya da
+    # "bu adım uygulanmaz" anlamında None döndürür; ilk yanıt veren adım kazanır.
+    _ROUTES = ('_route_advanced_analytics', '_route_smart_intent', '_route_math')
+
+    def _route_advanced_analytics(self, query: str, query_lower: str) -> Optional[Dict]:
+        """Gelişmiş analitik kontrolü - YENİ EKLENEN"""
+        if self._needs_advanced_analytics(query_lower) and self.analytics_engine:
+            return self._handle_advanced_analytics(query, {}, query_lower)
+        return None
+
+    def _route_smart_intent(self, query: str, query_lower: str) -> Optional[Dict]:
+        """Smart intent kullanımı - YENİ EKLENEN (şimdilik yalnızca günlük kaydı)"""
+        if self.smart_intent:
+            intent_result = self.smart_intent.analyze_intent(query)
+            if intent_result.confidence > 0.7:
+                # Yüksek confidence ile smart processing
+                logging.info(f"Smart intent: {intent_result.name} (confidence: {intent_result.confidence:.2f})")
+        return None
+
+    def _route_math(self, query: str, query_lower: str) -> Optional[Dict]:
+        """YENÄ° EKLENEN: Matematik sorgularÄ±nÄ± Ã¶nce kontrol et - GÃœVENLÄ°"""
+        # Rakam, operatör ya da temel işlem kelimesi içermeyen sorgular matematik kontrolüne hiç girmez
+        if not _MATH_PROBE.search(query):
+            return None
+        try:
+            if self._is_math_query(query):
+                logging.info("Matematik sorgusu tespit edildi, Mathematics Engine'e yÃ¶nlendiriliyor.")
+                math_result = self.math_engine.process_math_query(query, self.structured_data)
+                
+                # SonuÃ§ kontrolÃ¼
+                if not isinstance(math_result, dict):
+                    math_result = {"text": "Matematik hesaplama hatasÄ± oluÅŸtu.", "chart": None}
+                if 'text' not in math_result:
+                    math_result['text'] = "Hesaplama tamamlanamadÄ±."
+                if 'chart' not in math_result:
+                    math_result['chart'] = None
+                    
+                return math_result
+                
+        except Exception as math_error:
+            logging.error(f"Mathematics Engine hatasÄ±: {math_error}")
+            # Matematik hatasÄ± durumunda normal flow'a devam et
+        return None
 
     def process_query(self, query: str, user: User) -> Dict:
         try:
             logging.info(f"KullanÄ±cÄ± '{user.id}' (Rol: {user.role}) sorgu yapÄ±yor: '{query}'")
             
-            # Gelişmiş analitik kontrolü - YENİ EKLENEN
-            if self.analytics_engine and self._needs_advanced_analytics(query):
-                return self._handle_advanced_analytics(query, {})
+            if not self._ready.wait(timeout=0.01):
+                return {"text": "Asistan verileri yüklüyor, lütfen birkaç saniye sonra tekrar deneyin.", "chart": None}
             
-            # Smart intent kullanımı - YENİ EKLENEN
-            if self.smart_intent:
-                intent_result = self.smart_intent.analyze_intent(query)
-                if intent_result.confidence > 0.7:
-                    # Yüksek confidence ile smart processing
-                    logging.info(f"Smart intent: {intent_result.name} (confidence: {intent_result.confidence:.2f})")
+            # Sorgu bir kez küçük harfe çevrilir, tüm anahtar kelime kontrolleri bunu kullanır
+            query_lower = query.lower()
             
-            # YENÄ° EKLENEN: Matematik sorgularÄ±nÄ± Ã¶nce kontrol et - GÃœVENLÄ°
-            try:
-                if self._is_math_query(query):
-                    logging.info("Matematik sorgusu tespit edildi, Mathematics Engine'e yÃ¶nlendiriliyor.")
-                    math_result = self.math_engine.process_math_query(query, self.structured_data)
-                    
-                    # SonuÃ§ kontrolÃ¼
-                    if not isinstance(math_result, dict):
-                        math_result = {"text": "Matematik hesaplama hatasÄ± oluÅŸtu.", "chart": None}
-                    if 'text' not in math_result:
-                        math_result['text'] = "Hesaplama tamamlanamadÄ±."
-                    if 'chart' not in math_result:
-                        math_result['chart'] = None
-                        
-                    return math_result
-                    
-            except Exception as math_error:
-                logging.error(f"Mathematics Engine hatasÄ±: {math_error}")
-                # Matematik hatasÄ± durumunda normal flow'a devam et
+            for route in self._ROUTES:
+                result = getattr(self, route)(query, query_lower)
+                if result is not None:
+                    return result
             
             # Mevcut intent analizi
             entities = self.nlp_proc.predict_intent(query, self.data_insights)
             intent = entities.get('intent', 'unknown')
             logging.info(f"Tespit edilen niyet: {intent}, VarlÄ±klar: {entities.get('entities')}")
 
-            if intent in ['individual_salary', 'salary_analysis'] and user.role != 'admin':
+            if intent in self._ADMIN_INTENTS and user.role != 'admin':
                 return {"text": "MaaÅŸ bilgilerine eriÅŸim yetkiniz bulunmamaktadÄ±r.", "chart": None}
 
             tool_to_use = self._select_tool(intent)
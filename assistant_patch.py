@@ -3,52 +3,116 @@
 
 # 1. Import eklemeleri (dosya başına):
 
-# Enhanced Data Processor import - YENİ EKLENEN
-try:
-    from enhanced_data_processor import EnhancedDataProcessor
-    ENHANCED_PROCESSOR_AVAILABLE = True
-except ImportError:
-    ENHANCED_PROCESSOR_AVAILABLE = False
+# Enhanced Data Processor kontrolü - YENİ EKLENEN
+# Yalnızca modülün varlığına bakılır; import ilk satış analizinde yapılır (bkz. enhanced_processor)
+import importlib.util
+
+ENHANCED_PROCESSOR_AVAILABLE = importlib.util.find_spec('enhanced_data_processor') is not None
+if not ENHANCED_PROCESSOR_AVAILABLE:
     logging.warning("Enhanced Data Processor bulunamadı, temel analiz kullanılacak")
 
+import numpy as np
+
+# Sayı biçimlendirme: binlik ayırıcı nokta, ondalık ayırıcı virgül (1.234.567,89)
+_TR_NUMBER_TABLE = str.maketrans(',.', '.,')
+
+def _fmt(value: float, decimals: int = 2, sign: bool = False) -> str:
+    """Sayıyı Türkçe gösterimle biçimlendirir; format + tek translate geçişi."""
+    return f"{value:{'+' if sign else ''},.{decimals}f}".translate(_TR_NUMBER_TABLE)
+
+# Satış / gelişmiş analiz anahtar kelimeleri modül yüklenirken tek regex'e derlenir
+ENHANCED_KEYWORDS = [
+    'analiz', 'karşılaştır', 'trend', 'performans', 'rapor',
+    'dağılım', 'istatistik', 'insight', 'çıkarım'
+]
+SALES_KEYWORDS = [
+    'ciro', 'satış', 'mağaza', 'büyüme', 'gelir', 'performans',
+    'revenue', 'sales', 'store', 'growth'
+]
+_ENHANCED_RE = re.compile('|'.join(map(re.escape, ENHANCED_KEYWORDS)))
+_SALES_RE = re.compile('|'.join(map(re.escape, SALES_KEYWORDS)))
+
+STORE_NAME_COLUMN = 'Mağaza Adı'
+
 
 # 2. AIAssistant.__init__ metoduna ekleyin:
 
         # Enhanced Data Processor - YENİ EKLENEN
-        if ENHANCED_PROCESSOR_AVAILABLE:
-            self.enhanced_processor = EnhancedDataProcessor()
-            logging.info("Enhanced Data Processor başarıyla yüklendi")
-        else:
-            self.enhanced_processor = None
+        # İlk erişimde oluşturulur (bkz. enhanced_processor özelliği)
+        self._enhanced_processor = None
+        # Satış tablosunun sütun konumları; tablo değişene kadar bir kez hesaplanır (bkz. _sales_columns)
+        self._sales_columns_cache = (None, {})
 
 
 # 3. AIAssistant sınıfına yeni metodlar ekleyin:
 
-    def _handle_sales_analysis(self, query: str, entities: Dict) -> Dict:
+    @property
+    def enhanced_processor(self):
+        """Enhanced Data Processor'ı ilk kullanımda import edip oluşturur; modül yoksa None döndürür."""
+        if self._enhanced_processor is None and ENHANCED_PROCESSOR_AVAILABLE:
+            from enhanced_data_processor import EnhancedDataProcessor
+            self._enhanced_processor = EnhancedDataProcessor()
+            logging.info("Enhanced Data Processor başarıyla yüklendi")
+        return self._enhanced_processor
+
+    @staticmethod
+    def _extreme_positions(series, top: int = 0, bottom: int = 0):
+        """En büyük `top` ve en küçük `bottom` değerin satır konumları (sıralı; NaN'lar yalnızca değer yetmezse sona eklenir).
+        nlargest/nsmallest'in tam sıralaması yerine tek bir np.argpartition (QuickSelect) kullanır."""
+        values = series.to_numpy(dtype=float)
+        missing = np.isnan(values)
+        valid, nan_pos = np.flatnonzero(~missing), np.flatnonzero(missing)
+        vals = values[valid]
+        n = len(vals)
+        nan_top, nan_bottom = nan_pos[:max(top - n, 0)], nan_pos[:max(bottom - n, 0)]
+        top, bottom = min(top, n), min(bottom, n)
+        kth = [k for k in (bottom - 1, n - top) if 0 <= k < n]
+        part = np.argpartition(vals, kth) if kth else np.arange(n)
+        
+        def pick(count, threshold, beyond):
+            # Sınırdaki eşit değerlerden önce gelen satırlar alınır (nlargest/nsmallest keep='first' gibi)
+            chosen = np.flatnonzero(beyond)
+            ties = np.flatnonzero(vals == threshold)[:count - len(chosen)]
+            return np.concatenate((chosen, ties))
+        
+        top_idx = pick(top, vals[part[n - top]], vals > vals[part[n - top]]) if top else part[:0]
+        bottom_idx = pick(bottom, vals[part[bottom - 1]], vals < vals[part[bottom - 1]]) if bottom else part[:0]
+        top_idx = top_idx[np.lexsort((top_idx, -vals[top_idx]))]
+        bottom_idx = bottom_idx[np.lexsort((bottom_idx, vals[bottom_idx]))]
+        return np.concatenate((valid[top_idx], nan_top)), np.concatenate((valid[bottom_idx], nan_bottom))
+
+    def _sales_columns(self, sales_data) -> Dict[str, int]:
+        """Satış tablosu için sütun adı -> konum sözlüğü - YENİ EKLENEN
+        İlk çağrıda 'Mağaza Adı' sütunu kategorik tipe çevrilir; sonraki çağrılar önbellekten döner."""
+        cached_frame, positions = self._sales_columns_cache
+        if cached_frame is not sales_data:
+            if STORE_NAME_COLUMN in sales_data.columns and sales_data[STORE_NAME_COLUMN].dtype == object:
+                sales_data[STORE_NAME_COLUMN] = sales_data[STORE_NAME_COLUMN].astype('category')
+            positions = {col: i for i, col in enumerate(sales_data.columns)}
+            self._sales_columns_cache = (sales_data, positions)
+        return positions
+
+    def _handle_sales_analysis(self, query: str, entities: Dict, query_lower: Optional[str] = None) -> Dict:
         """Satış verisi analizi için özel işleyici - YENİ EKLENEN"""
         
         if not self.enhanced_processor:
             return {"text": "Gelişmiş satış analizi şu anda kullanılamıyor.", "chart": None}
         
-        # Sales.xlsx dosyasını bul
-        sales_data = None
-        sales_filename = None
-        
-        for filename, df in self.structured_data.items():
-            if 'sales' in filename.lower() or 'satış' in filename.lower():
-                sales_data = df
-                sales_filename = filename
-                break
+        # Sales.xlsx dosyası: _initialize_system'de kurulan dosya türü indeksinden
+        sales_filename, sales_data = self._df_by_kind.get('sales', (None, None))
         
         if sales_data is None:
             return {"text": "Satış verisi bulunamadı. Lütfen sales.xlsx dosyasının yüklendiğinden emin olun.", "chart": None}
         
+        positions = self._sales_columns(sales_data)
+        
         # Enhanced analysis
         analysis = self.enhanced_processor.analyze_excel_structure(sales_data, sales_filename)
         insights = self.enhanced_processor.generate_smart_insights(analysis)
         
-        # Query'ye göre spesifik analiz
-        query_lower = query.lower()
+        # Query'ye göre spesifik analiz (process_query'de bir kez küçük harfe çevrilmiş sorgu)
+        if query_lower is None:
+            query_lower = query.lower()
         
         if 'ortalama' in query_lower and 'ciro' in query_lower:
             if '2024' in query_lower:
@@ -58,30 +122,35 @@ except ImportError:
             else:
                 col_name = 'Ciro 2024 (TRY-KDV siz)'  # Default
             
-            if col_name in sales_data.columns:
-                avg_value = sales_data[col_name].mean()
+            if col_name in positions:
+                # Özet istatistikler sütun üzerinden tek agg çağrısıyla hesaplanır
+                stats = sales_data[col_name].agg(['mean', 'max', 'min', 'std'])
+                avg_value = stats['mean']
                 total_stores = len(sales_data)
                 
-                response = f"""
+                parts = [f"""
 **📊 Ciro Analizi Sonuçları**
 
-**Ortalama Ciro ({col_name.split('(')[0].strip()}):** {avg_value:,.2f} TL
+**Ortalama Ciro ({col_name.split('(')[0].strip()}):** {_fmt(avg_value)} TL
 
 **Detaylar:**
 - Toplam mağaza sayısı: {total_stores}
-- En yüksek ciro: {sales_data[col_name].max():,.2f} TL
-- En düşük ciro: {sales_data[col_name].min():,.2f} TL
-- Standart sapma: {sales_data[col_name].std():,.2f} TL
+- En yüksek ciro: {_fmt(stats['max'])} TL
+- En düşük ciro: {_fmt(stats['min'])} TL
+- Standart sapma: {_fmt(stats['std'])} TL
 
 **En İyi Performans Gösteren 3 Mağaza:**
-""".replace(',', '.')
+"""]
                 
-                top_stores = sales_data.nlargest(3, col_name)
-                for i, (_, row) in enumerate(top_stores.iterrows(), 1):
-                    response += f"
-{i}. {row['Mağaza Adı']}: {row[col_name]:,.2f} TL".replace(',', '.')
+                top_pos, _ = self._extreme_positions(sales_data[col_name], top=3)
+                # Satır başına Series üretmemek için yalnızca iki sütun düz tuple olarak gezilir
+                cols = [positions[STORE_NAME_COLUMN], positions[col_name]]
+                top_stores = sales_data.iloc[top_pos, cols]
+                for i, (store_name, value) in enumerate(top_stores.itertuples(index=False, name=None), 1):
+                    parts.append(f"
+{i}. {store_name}: {_fmt(value)} TL")
                 
-                return {"text": response, "chart": None}
+                return {"text": "".join(parts), "chart": None}
         
         elif 'en yüksek' in query_lower or 'en iyi' in query_lower:
             # En yüksek ciro analizi
@@ -90,42 +159,46 @@ except ImportError:
             else:
                 col_name = 'Ciro 2024 (TRY-KDV siz)'
             
-            if col_name in sales_data.columns:
+            if col_name in positions:
                 max_idx = sales_data[col_name].idxmax()
                 best_store = sales_data.loc[max_idx]
                 
-                response = f"""
+                parts = [f"""
 **🏆 En Yüksek Ciro Analizi**
 
 **En İyi Performans:** {best_store['Mağaza Adı']}
-**Ciro Tutarı:** {best_store[col_name]:,.2f} TL
+**Ciro Tutarı:** {_fmt(best_store[col_name])} TL
 
 **Karşılaştırma:**
-- Ortalamadan fark: +{(best_store[col_name] - sales_data[col_name].mean()):,.2f} TL
-- Büyüme oranı: %{best_store['Ciro % Büyüme(24den25e)']:,.1f}
+- Ortalamadan fark: +{_fmt(best_store[col_name] - sales_data[col_name].mean())} TL
+- Büyüme oranı: %{_fmt(best_store['Ciro % Büyüme(24den25e)'], 1)}
 
 **Top 5 Mağaza:**
-""".replace(',', '.')
+"""]
                 
-                top5 = sales_data.nlargest(5, col_name)
-                for i, (_, row) in enumerate(top5.iterrows(), 1):
-                    response += f"
-{i}. {row['Mağaza Adı']}: {row[col_name]:,.2f} TL".replace(',', '.')
+                top_pos, _ = self._extreme_positions(sales_data[col_name], top=5)
+                cols = [positions[STORE_NAME_COLUMN], positions[col_name]]
+                top5 = sales_data.iloc[top_pos, cols]
+                for i, (store_name, value) in enumerate(top5.itertuples(index=False, name=None), 1):
+                    parts.append(f"
+{i}. {store_name}: {_fmt(value)} TL")
                 
-                return {"text": response, "chart": None}
+                return {"text": "".join(parts), "chart": None}
         
         elif 'büyüme' in query_lower or 'artış' in query_lower:
             # Büyüme analizi
             growth_col = 'Ciro % Büyüme(24den25e)'
-            if growth_col in sales_data.columns:
-                avg_growth = sales_data[growth_col].mean()
-                positive_growth = (sales_data[growth_col] > 0).sum()
-                negative_growth = (sales_data[growth_col] < 0).sum()
+            if growth_col in positions:
+                # Büyüme değerleri bir kez NumPy dizisine alınıp ortalama ve işaret sayımları oradan yapılır
+                growth_values = sales_data[growth_col].to_numpy(dtype=float)
+                avg_growth = np.nanmean(growth_values)
+                positive_growth = int((growth_values > 0).sum())
+                negative_growth = int((growth_values < 0).sum())
                 
-                response = f"""
+                parts = [f"""
 **📈 Ciro Büyüme Analizi**
 
-**Genel Büyüme:** %{avg_growth:.2f}
+**Genel Büyüme:** %{_fmt(avg_growth)}
 
 **Performans Dağılımı:**
 - Pozitif büyüme gösteren: {positive_growth} mağaza
@@ -133,77 +206,67 @@ except ImportError:
 - Toplam mağaza sayısı: {len(sales_data)}
 
 **En Yüksek Büyüme Gösteren 3 Mağaza:**
-""".replace(',', '.')
+"""]
                 
-                top_growth = sales_data.nlargest(3, growth_col)
-                for i, (_, row) in enumerate(top_growth.iterrows(), 1):
-                    response += f"
-{i}. {row['Mağaza Adı']}: %{row[growth_col]:.2f}".replace(',', '.')
+                # En yüksek ve en düşük 3 mağaza tek bölümlemeyle bulunur
+                top_pos, bottom_pos = self._extreme_positions(sales_data[growth_col], top=3, bottom=3)
+                cols = [positions[STORE_NAME_COLUMN], positions[growth_col]]
+                top_growth = sales_data.iloc[top_pos, cols]
+                for i, (store_name, value) in enumerate(top_growth.itertuples(index=False, name=None), 1):
+                    parts.append(f"
+{i}. {store_name}: %{_fmt(value)}")
                 
-                response += f"
+                parts.append(f"
 
-**En Düşük Performans Gösteren 3 Mağaza:**"
-                bottom_growth = sales_data.nsmallest(3, growth_col)
-                for i, (_, row) in enumerate(bottom_growth.iterrows(), 1):
-                    response += f"
-{i}. {row['Mağaza Adı']}: %{row[growth_col]:.2f}".replace(',', '.')
+**En Düşük Performans Gösteren 3 Mağaza:**")
+                bottom_growth = sales_data.iloc[bottom_pos, cols]
+                for i, (store_name, value) in enumerate(bottom_growth.itertuples(index=False, name=None), 1):
+                    parts.append(f"
+{i}. {store_name}: %{_fmt(value)}")
                 
-                return {"text": response, "chart": None}
+                return {"text": "".join(parts), "chart": None}
         
         # Genel analiz
-        response = f"""
+        parts = [f"""
 **📊 Gelişmiş Satış Veri Analizi**
 
 **Dosya:** {sales_filename}
 **Veri Kalitesi:** {len(insights)} insight tespit edildi
 
 **Akıllı Çıkarımlar:**
-"""
+"""]
         for insight in insights:
-            response += f"
-• {insight}"
+            parts.append(f"
+• {insight}")
         
-        response += f"
+        parts.append(f"
 
-**Önerilen Sorular:**"
+**Önerilen Sorular:**")
         suggestions = self.enhanced_processor.create_query_suggestions(analysis)
         for suggestion in suggestions[:5]:
-            response += f"
-• {suggestion}"
+            parts.append(f"
+• {suggestion}")
         
-        return {"text": response, "chart": None}
+        return {"text": "".join(parts), "chart": None}
     
-    def _needs_enhanced_analysis(self, query: str) -> bool:
+    def _needs_enhanced_analysis(self, query_lower: str) -> bool:
         """Sorgunun gelişmiş analiz gerektirip gerektirmediğini kontrol eder - YENİ EKLENEN"""
-        
-        enhanced_keywords = [
-            'analiz', 'karşılaştır', 'trend', 'performans', 'rapor',
-            'dağılım', 'istatistik', 'insight', 'çıkarım'
-        ]
-        
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in enhanced_keywords)
+        return bool(_ENHANCED_RE.search(query_lower))
     
-    def _is_sales_query(self, query: str) -> bool:
+    def _is_sales_query(self, query_lower: str) -> bool:
         """Satış sorgularını tespit eder - YENİ EKLENEN"""
-        
-        sales_keywords = [
-            'ciro', 'satış', 'mağaza', 'büyüme', 'gelir', 'performans',
-            'revenue', 'sales', 'store', 'growth'
-        ]
-        
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in sales_keywords)
+        return bool(_SALES_RE.search(query_lower))
 
 
 # 4. process_query metodunun başına ekleyin:
 
         # Enhanced Data Processor kontrolü - YENİ EKLENEN
-        if self.enhanced_processor and self._is_sales_query(query):
-            return self._handle_sales_analysis(query, entities)
+        query_lower = query.lower()
+        if ENHANCED_PROCESSOR_AVAILABLE and self._is_sales_query(query_lower):
+            return self._handle_sales_analysis(query, entities, query_lower)
         
         # Gelişmiş analiz gerekli mi kontrol et - YENİ EKLENEN
-        if self.enhanced_processor and self._needs_enhanced_analysis(query):
+        if ENHANCED_PROCESSOR_AVAILABLE and self._needs_enhanced_analysis(query_lower):
             # Gelişmiş analiz mantığı burada implementasyonu geliştirilecek
             pass
 
@@ -2,12 +2,44 @@
 """
 Kullanıcı kimlik doğrulama, yetkilendirme ve oturum yönetimi ile ilgili tüm fonksiyonları içerir.
 """
+import hashlib
+import hmac
 import json
 import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_login import UserMixin
 
-from config import USERS_DB_PATH
+from config import USERS_DB_PATH, USERS_JSON_PATH
+
+# Yeni şifreler argon2id ile hashlenir (libargon2, C); eski pbkdf2 hash'leri doğrulanmaya devam eder
+# ve ilk başarılı girişte argon2id'ye yükseltilir.
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    _password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+    ARGON2_AVAILABLE = True
+except ImportError:
+    _password_hasher = None
+    ARGON2_AVAILABLE = False
+    logging.warning("argon2-cffi bulunamadı, şifreler pbkdf2:sha256 ile hashlenecek")
+
+ARGON2_PREFIX = "$argon2"
+
+# Kullanıcılar WAL kipindeki tek bir SQLite bağlantısından okunur; her istekte dosya okuyup JSON ayrıştırmak yerine
+# birincil anahtar üzerinden tek satır aranır. Bağlantı ilk kullanımda açılır ve iş parçacıkları arasında kilitle paylaşılır.
+_db_conn = None
+_db_lock = threading.Lock()
+
+# Başarılı şifre doğrulamaları (hash, HMAC(şifre)) anahtarıyla hatırlanır; tekrar girişlerde hash hesabı atlanır.
+# Ham şifre bellekte tutulmaz; anahtar süreç başına rastgele üretilir. Hash değişirse (şifre değişimi) kayıt kendiliğinden geçersizdir.
+VERIFY_CACHE_SIZE = 1024
+_verify_key = os.urandom(32)
+_verified_cache: OrderedDict = OrderedDict()
+_verify_lock = threading.Lock()
 
 class User(UserMixin):
     """Flask-Login için Kullanıcı sınıfı"""
@@ -15,41 +47,117 @@ class User(UserMixin):
         self.id = id
         self.role = role
 
-def _load_users_from_db() -> dict:
+def _default_users() -> list:
     """
-    Kullanıcı veritabanını (users.json) okur.
-    Eğer dosya yoksa, varsayılan admin ve user kullanıcılarını oluşturur.
+    Başlangıç kullanıcıları: eski users.json varsa oradakiler, yoksa varsayılan admin ve user.
     """
     try:
-        with open(USERS_DB_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(USERS_JSON_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        logging.info(f"'{USERS_JSON_PATH}' içindeki kullanıcılar '{USERS_DB_PATH}' veritabanına aktarılıyor.")
+        return [(name, info.get('password_hash', ''), info.get('role', 'user')) for name, info in data.items()]
     except FileNotFoundError:
-        logging.warning(f"'{USERS_DB_PATH}' bulunamadı. Varsayılan kullanıcılar oluşturuluyor (admin/admin, user/user).")
-        # pbkdf2:sha256, güvenli bir hashleme yöntemidir.
-        hashed_admin_pass = generate_password_hash("admin", method='pbkdf2:sha256')
-        hashed_user_pass = generate_password_hash("user", method='pbkdf2:sha256')
-        
-        default_users = {
-            "admin": {"password_hash": hashed_admin_pass, "role": "admin"},
-            "user": {"password_hash": hashed_user_pass, "role": "user"}
-        }
-        
-        with open(USERS_DB_PATH, 'w', encoding='utf-8') as f:
-            json.dump(default_users, f, indent=4)
-        return default_users
+        pass
     except json.JSONDecodeError:
-        logging.error(f"'{USERS_DB_PATH}' dosyası bozuk veya geçersiz JSON formatında.")
-        return {}
+        logging.error(f"'{USERS_JSON_PATH}' dosyası bozuk veya geçersiz JSON formatında.")
+    
+    logging.warning("Kullanıcı bulunamadı. Varsayılan kullanıcılar oluşturuluyor (admin/admin, user/user).")
+    return [
+        ("admin", _hash_password("admin"), "admin"),
+        ("user", _hash_password("user"), "user"),
+    ]
+
+def _hash_password(password: str) -> str:
+    """Şifreyi argon2id ile (yoksa pbkdf2:sha256 ile) hashler."""
+    if ARGON2_AVAILABLE:
+        return _password_hasher.hash(password)
+    return generate_password_hash(password, method='pbkdf2:sha256')
+
+def _check_password(password_hash: str, password: str) -> bool:
+    """Hash biçimine göre argon2id ya da werkzeug (pbkdf2) doğrulaması yapar."""
+    if password_hash.startswith(ARGON2_PREFIX):
+        if not ARGON2_AVAILABLE:
+            return False
+        try:
+            return _password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def _needs_rehash(password_hash: str) -> bool:
+    """Hash eski bir yöntemle ya da farklı argon2 parametreleriyle mi üretilmiş?"""
+    if not ARGON2_AVAILABLE:
+        return False
+    if not password_hash.startswith(ARGON2_PREFIX):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(password_hash)
+    except InvalidHashError:
+        return False
+
+def _get_db() -> sqlite3.Connection:
+    """
+    Kullanıcı veritabanı (users.db) bağlantısını döndürür.
+    İlk çağrıda tabloyu oluşturur; tablo boşsa başlangıç kullanıcılarını ekler.
+    """
+    global _db_conn
+    if _db_conn is not None:
+        return _db_conn
+    with _db_lock:
+        if _db_conn is None:
+            conn = sqlite3.connect(USERS_DB_PATH, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-2000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users("
+                "username TEXT PRIMARY KEY, password_hash TEXT NOT NULL, role TEXT NOT NULL)"
+            )
+            if conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is None:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO users(username, password_hash, role) VALUES (?, ?, ?)",
+                    _default_users()
+                )
+            _db_conn = conn
+    return _db_conn
+
+def _fetch_user(username: str):
+    """Kullanıcının (password_hash, role) satırı; yoksa None."""
+    conn = _get_db()
+    with _db_lock:
+        return conn.execute(
+            "SELECT password_hash, role FROM users WHERE username = ?", (username,)
+        ).fetchone()
+
+def _verify_password(password_hash: str, password: str) -> bool:
+    """_check_password sonucunu başarılı doğrulamalar için önbellekten döndürür."""
+    key = (password_hash, hmac.new(_verify_key, password.encode('utf-8'), hashlib.sha256).digest())
+    with _verify_lock:
+        if key in _verified_cache:
+            _verified_cache.move_to_end(key)
+            return True
+    if not _check_password(password_hash, password):
+        return False
+    with _verify_lock:
+        _verified_cache[key] = True
+        while len(_verified_cache) > VERIFY_CACHE_SIZE:
+            _verified_cache.popitem(last=False)
+    return True
+
+def _update_password_hash(username: str, password_hash: str):
+    """Kullanıcının şifre hash'ini günceller (eski pbkdf2 hash'lerini argon2id'ye yükseltmek için)."""
+    conn = _get_db()
+    with _db_lock:
+        conn.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
 
 def load_user(user_id: str) -> User or None:
     """
     Flask-Login'in user_loader'ı tarafından kullanılır.
     Verilen kullanıcı ID'sine karşılık gelen User nesnesini döndürür.
     """
-    users = _load_users_from_db()
-    user_data = users.get(user_id)
-    if user_data:
-        return User(id=user_id, role=user_data.get('role', 'user'))
+    row = _fetch_user(user_id)
+    if row:
+        return User(id=user_id, role=row[1] or 'user')
     return None
 
 def verify_user(username: str, password: str) -> User or None:
@@ -57,8 +165,9 @@ def verify_user(username: str, password: str) -> User or None:
     Kullanıcı adı ve şifreyi doğrular.
     Başarılı ise User nesnesini, değilse None döndürür.
     """
-    users = _load_users_from_db()
-    user_data = users.get(username)
-    if user_data and check_password_hash(user_data.get('password_hash', ''), password):
-        return User(id=username, role=user_data.get('role', 'user'))
-    return None
\ No newline at end of file
+    row = _fetch_user(username)
+    if row and _verify_password(row[0], password):
+        if _needs_rehash(row[0]):
+            _update_password_hash(username, _hash_password(password))
+        return User(id=username, role=row[1] or 'user')
+    return None
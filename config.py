@@ -15,7 +15,9 @@ LOG_LEVEL = "INFO" # DEBUG, INFO, WARNING, ERROR, CRITICAL
 DATA_DIRECTORY = "company_data"
 INDEX_PATH = "faiss_index.bin"
 CHUNKS_PATH = "chunks.pkl"
-USERS_DB_PATH = "users.json"
+USERS_DB_PATH = "users.db"
+DATA_CACHE_DIR = ".cache" # load_all_data sonuçlarının dizin parmak izine göre saklandığı klasör
+USERS_JSON_PATH = "users.json" # Eski JSON kullanıcı dosyası; varsa ilk açılışta SQLite'a aktarılır
 
 # --- Model Ayarları ---
 EMBEDDING_MODEL = 'paraphrase-multilingual-MiniLM-L12-v2'
@@ -28,4 +30,7 @@ FLASK_SECRET_KEY = os.getenv("FLASK_SECRET_KEY")
 
 # --- Arama ve Cevap Ayarları ---
 SIMILARITY_SEARCH_K = 8 # Benzerlik aramasında getirilecek chunk sayısı
-CONTEXT_MAX_LENGTH = 4000 # Modele gönderilecek maksimum bağlam karakter sayısı
\ No newline at end of file
+CONTEXT_MAX_LENGTH = 4000 # Modele gönderilecek maksimum bağlam karakter sayısı
+SPECULATIVE_WEB_SEARCH = os.getenv("SPECULATIVE_WEB_SEARCH", "0") == "1" # Gemini çağrısıyla paralel yedek web araması (her RAG cevabında ücretli SerpAPI isteği atar; varsayılan kapalı)
+QUERY_CACHE_SIZE = 512 # Önbellekte tutulacak maksimum (sorgu, rol) yanıtı
+QUERY_CACHE_TTL = 300 # Önbellekteki yanıtın geçerlilik süresi (saniye)
@@ -4,17 +4,85 @@ Farklı dosya formatlarındaki (Excel, CSV, PDF, Word) verileri okumak,
 işlemek ve standart bir yapıda döndürmekle sorumludur.
 """
 import os
+import re
 import logging
+import pickle
+import hashlib
+import importlib.util
+import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Dict, List, Any, Optional
+from config import DATA_CACHE_DIR
 
 # Gerekli kütüphaneler: pip install pandas openpyxl pypdf python-docx
 
+# Dosyaları paralel okuyan iş parçacığı sayısı
+LOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+# Atlanacak geçici/sistem dosyaları: Excel kilidi (~$), .tmp/.temp, Python cache, macOS .DS_Store, Windows Thumbs.db
+_SKIP_FILE_RE = re.compile(r'~\$|\.tmp|\.temp|__pycache__|\.DS_Store|Thumbs\.db')
+
+# Önbellek biçimi değiştiğinde artırılır; eski önbellek dosyaları geçersiz sayılır
+DATA_CACHE_VERSION = 1
+
+# İsteğe bağlı hızlı okuyucular: pyarrow (çok iş parçacıklı CSV) ve python-calamine (Rust xlsx okuyucu).
+# pandas'ın 'calamine' motoru 2.2 sürümüyle geldi; daha eski pandas'ta openpyxl kullanılır.
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+_PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split('.')[:2])
+CALAMINE_AVAILABLE = _PANDAS_VERSION >= (2, 2) and importlib.util.find_spec('python_calamine') is not None
+
+def _normalize_arrow_csv(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    pyarrow okuyucusunun sonucunu varsayılan okuyucununkiyle aynı biçime getirir (eksik metin None değil NaN).
+    pyarrow tarih/saat metinlerini tarihe çevirdiyse ya da UTF-8 olmayan metni bytes bıraktıysa None döner;
+    bu durumda varsayılan okuyucu kullanılır.
+    """
+    for col in df.columns:
+        series = df[col]
+        if series.dtype.kind in 'mM':
+            return None
+        if series.dtype == object:
+            first = series.first_valid_index()
+            if first is not None and not isinstance(series.loc[first], str):
+                return None
+            if series.hasnans:
+                df[col] = series.where(series.notna(), np.nan)
+    return df
+
 class UniversalDataLoader:
+    def __init__(self):
+        # Uzantı -> (okuyucu, insights türü, yapısal_mı)
+        self._loaders = {
+            '.xlsx': (self._load_excel, 'excel', True),
+            '.xls': (self._load_excel, 'excel', True),
+            '.csv': (self._load_csv, 'csv', True),
+            '.pdf': (self._load_pdf, 'pdf', False),
+            '.docx': (self._load_docx, 'word', False),
+        }
+
     def _load_excel(self, file_path: str) -> pd.DataFrame:
+        if CALAMINE_AVAILABLE:
+            try:
+                return pd.read_excel(file_path, engine='calamine')
+            except Exception as e:
+                logging.warning(f"'{file_path}' calamine ile okunamadı ({e}), openpyxl ile deneniyor.")
         return pd.read_excel(file_path, engine='openpyxl')
 
     def _load_csv(self, file_path: str) -> pd.DataFrame:
+        if PYARROW_AVAILABLE:
+            try:
+                df = _normalize_arrow_csv(pd.read_csv(file_path, engine='pyarrow'))
+                if df is not None:
+                    return df
+            except Exception as e:
+                # pyarrow bazı düzensiz dosyaları reddeder; varsayılan (C) okuyucuya düşülür
+                logging.info(f"'{file_path}' pyarrow ile okunamadı ({e}), varsayılan okuyucu deneniyor.")
         try:
             return pd.read_csv(file_path)
         except UnicodeDecodeError:
@@ -24,10 +92,7 @@ class UniversalDataLoader:
     def _load_pdf(self, file_path: str) -> str:
         from pypdf import PdfReader
         reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
+        return "".join(page.extract_text() or "" for page in reader.pages)
 
     def _load_docx(self, file_path: str) -> str:
         from docx import Document
@@ -37,41 +102,125 @@ class UniversalDataLoader:
     def _process_structured_data(self, df: pd.DataFrame) -> Dict[str, Any]:
         """DataFrame'i analiz eder ve mağaza, çalışan gibi özel bilgileri çıkarır."""
         insights = {'store_rows': {}, 'employee_rows': {}}
-        df = df.fillna('').apply(lambda x: x.str.strip() if x.dtype == "object" else x)
 
         store_col = next((c for c in df.columns if any(k in c.lower() for k in ['mağaza', 'store', 'şube'])), None)
         emp_col = next((c for c in df.columns if any(k in c.lower() for k in ['ad soyad', 'çalışan', 'personel'])), None)
+        if not store_col and not emp_col:
+            return insights
+        
+        # Yalnızca metin (object) sütunları kırpılır; satırlar tek to_dict geçişiyle sözlüğe çevrilir
+        df = df.fillna('')
+        text_cols = df.select_dtypes(include='object').columns
+        df[text_cols] = df[text_cols].apply(lambda x: x.str.strip())
         
-        if store_col:
-            for _, row in df.iterrows():
-                name = row[store_col]
-                if name: insights['store_rows'][name] = row.to_dict()
-        if emp_col:
-            for _, row in df.iterrows():
-                name = row[emp_col]
-                if name: insights['employee_rows'][name] = row.to_dict()
+        for record in df.to_dict(orient='records'):
+            if store_col and record[store_col]:
+                insights['store_rows'][record[store_col]] = record
+            if emp_col and record[emp_col]:
+                insights['employee_rows'][record[emp_col]] = record
         
         return insights
 
     def _should_skip_file(self, filename: str) -> bool:
         """Atlanması gereken dosyaları kontrol eder."""
-        skip_patterns = [
-            '~$',  # Excel geçici dosyaları
-            '.tmp',  # Geçici dosyalar
-            '.temp',  # Geçici dosyalar
-            '__pycache__',  # Python cache
-            '.DS_Store',  # macOS sistem dosyası
-            'Thumbs.db',  # Windows thumbnail cache
-        ]
+        return _SKIP_FILE_RE.search(filename) is not None
+
+    def _load_one(self, data_directory: str, filename: str) -> Optional[Tuple[Any, Dict, bool]]:
+        """
+        Tek bir dosyayı yükler.
+        Returns:
+            (içerik, çıkarımlar, yapısal_mı); dosya atlandıysa None,
+            yükleme hata verdiyse içerik None olan demet
+        """
+        file_path = os.path.join(data_directory, filename)
         
-        for pattern in skip_patterns:
-            if pattern in filename:
-                return True
-        return False
+        # Dosya kontrolü
+        if not os.path.isfile(file_path):
+            return None
+            
+        # Atlanması gereken dosyaları kontrol et
+        if self._should_skip_file(filename):
+            logging.info(f"'{filename}' dosyası atlandı (geçici/sistem dosyası).")
+            return None
+
+        file_ext = os.path.splitext(filename)[1].lower()
+        content = None
+        insights = {}
+        
+        try:
+            logging.info(f"'{filename}' dosyası işleniyor...")
+            loader = self._loaders.get(file_ext)
+            if loader is None:
+                logging.info(f"'{filename}' desteklenmeyen dosya formatı, atlandı.")
+                return None
+            load, file_type, structured = loader
+            content = load(file_path)
+            if structured:
+                insights = self._process_structured_data(content)
+            insights['type'] = file_type
+            
+            if content is not None:
+                logging.info(f"'{filename}' başarıyla yüklendi.")
+                return content, insights, structured
+            
+        except Exception as e:
+            logging.error(f"'{filename}' dosyası yüklenirken hata oluştu: {e}")
+            # Dosya yükleme hatası durumunda devam et, uygulamayı durdurma
+            return None, {}, False
+        return None
+
+    def _dir_fingerprint(self, data_directory: str) -> str:
+        """Dizindeki dosyaların (ad, değişiklik zamanı, boyut) bilgisinden parmak izi üretir."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(DATA_CACHE_VERSION).encode())
+        for filename in sorted(os.listdir(data_directory)):
+            # Geçici/sistem dosyaları (ör. açık Excel'in ~$ kilidi) önbelleği geçersiz kılmasın
+            if self._should_skip_file(filename):
+                continue
+            file_path = os.path.join(data_directory, filename)
+            if not os.path.isfile(file_path):
+                continue
+            stat = os.stat(file_path)
+            digest.update(f"{filename}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    def _read_cache(self, cache_path: str) -> Optional[Tuple[Dict, Dict, Dict]]:
+        """Önbellek dosyası varsa okur; yoksa ya da bozuksa None döner."""
+        if not os.path.isfile(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            logging.info(f"Veriler önbellekten yüklendi: '{cache_path}'")
+            return cached
+        except Exception as e:
+            logging.warning(f"Veri önbelleği okunamadı, dosyalar yeniden işlenecek: {e}")
+            return None
+
+    def _write_cache(self, cache_path: str, result: Tuple[Dict, Dict, Dict]) -> None:
+        """Sonucu önbelleğe yazar; yarım kalan yazımlar geçici dosya sayesinde okunmaz."""
+        cache_dir = os.path.dirname(cache_path)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+            # Aynı dizine ait eski önbellek dosyalarını temizle
+            prefix = os.path.basename(cache_path).rsplit('_', 1)[0] + '_'
+            for name in os.listdir(cache_dir):
+                if name.startswith(prefix) and name.endswith('.pkl') and os.path.join(cache_dir, name) != cache_path:
+                    os.remove(os.path.join(cache_dir, name))
+        except Exception as e:
+            logging.warning(f"Veri önbelleği yazılamadı: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     def load_all_data(self, data_directory: str) -> Tuple[Dict, Dict, Dict]:
         """
         Verilen dizindeki tüm desteklenen dosyaları yükler ve işler.
+        Dosyalar iş parçacığı havuzunda paralel okunur (zip açma / dosya G/Ç sırasında GIL bırakılır).
+        Dizin değişmediyse (aynı parmak izi) sonuç DATA_CACHE_DIR altındaki pickle önbelleğinden okunur.
         Returns:
             knowledge_base: Dosya adı -> içerik (DataFrame veya metin)
             structured_data: Dosya adı -> DataFrame
@@ -85,52 +234,33 @@ class UniversalDataLoader:
             logging.error(f"Veri dizini bulunamadı: '{data_directory}'")
             return knowledge_base, structured_data, data_insights
 
-        for filename in os.listdir(data_directory):
-            file_path = os.path.join(data_directory, filename)
-            
-            # Dosya kontrolü
-            if not os.path.isfile(file_path):
-                continue
-                
-            # Atlanması gereken dosyaları kontrol et
-            if self._should_skip_file(filename):
-                logging.info(f"'{filename}' dosyası atlandı (geçici/sistem dosyası).")
-                continue
+        dir_key = hashlib.blake2b(os.path.abspath(data_directory).encode('utf-8', 'surrogateescape'), digest_size=8).hexdigest()
+        cache_path = os.path.join(DATA_CACHE_DIR, f"{dir_key}_{self._dir_fingerprint(data_directory)}.pkl")
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
 
-            file_ext = os.path.splitext(filename)[1].lower()
-            content = None
-            insights = {}
-            
-            try:
-                logging.info(f"'{filename}' dosyası işleniyor...")
-                if file_ext in ['.xlsx', '.xls']:
-                    content = self._load_excel(file_path)
-                    insights = self._process_structured_data(content)
-                    insights['type'] = 'excel'
-                    structured_data[filename] = content
-                elif file_ext == '.csv':
-                    content = self._load_csv(file_path)
-                    insights = self._process_structured_data(content)
-                    insights['type'] = 'csv'
-                    structured_data[filename] = content
-                elif file_ext == '.pdf':
-                    content = self._load_pdf(file_path)
-                    insights['type'] = 'pdf'
-                elif file_ext == '.docx':
-                    content = self._load_docx(file_path)
-                    insights['type'] = 'word'
-                else:
-                    logging.info(f"'{filename}' desteklenmeyen dosya formatı, atlandı.")
+        filenames = os.listdir(data_directory)
+        failed = False
+        with ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix='data-load') as pool:
+            futures = [pool.submit(self._load_one, data_directory, filename) for filename in filenames]
+            # Sonuçlar dizin sırasıyla toplanır; dosya türü seçimi ilk eşleşen dosyaya göre yapıldığından sıra korunur
+            for filename, future in zip(filenames, futures):
+                loaded = future.result()
+                if loaded is None:
                     continue
-                
-                if content is not None:
-                    knowledge_base[filename] = content
-                    data_insights[filename] = insights
-                    logging.info(f"'{filename}' başarıyla yüklendi.")
-                
-            except Exception as e:
-                logging.error(f"'{filename}' dosyası yüklenirken hata oluştu: {e}")
-                # Dosya yükleme hatası durumunda devam et, uygulamayı durdurma
+                content, insights, structured = loaded
+                if content is None:
+                    failed = True
+                    continue
+                knowledge_base[filename] = content
+                data_insights[filename] = insights
+                if structured:
+                    structured_data[filename] = content
 
         logging.info(f"Toplam {len(knowledge_base)} dosya başarıyla yüklendi.")
-        return knowledge_base, structured_data, data_insights
\ No newline at end of file
+        result = (knowledge_base, structured_data, data_insights)
+        # Yüklenemeyen dosya varsa önbelleğe yazma; hata kalıcı hale gelmesin
+        if not failed:
+            self._write_cache(cache_path, result)
+        return result
@@ -0,0 +1,17 @@
+# gunicorn.conf.py
+"""
+Production sunucu ayarları. `gunicorn app:app` komutu bu dosyayı otomatik okur.
+Varsayılan worker thread'li (gthread): açılıştaki veri yükleme/embedding gerçek bir OS thread'inde çalışır
+ve /health bu sırada cevap vermeye devam eder. gevent worker GUNICORN_WORKER_CLASS=gevent ile seçilebilir.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# gevent, uygulamayı import etmeden önce monkey.patch_all() uygular ve thread'leri greenlet'e çevirir;
+# CPU yoğun açılış işi hub'ı bloklar (heartbeat kaçar, worker yeniden başlar). Bu yüzden yalnızca isteğe bağlıdır,
+# app.py de gevent altında açılış işini hub'ın yerel thread havuzunda (gerçek OS thread'i) başlatır.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 60
@@ -13,6 +13,34 @@ from sentence_transformers import SentenceTransformer
 
 from config import EMBEDDING_MODEL, INDEX_PATH, CHUNKS_PATH
 
+# Büyük bilgi tabanlarında düz L2 indeksi yerine ürün-kuantize (IVF-PQ, vektör başına 16 bayt) indeks.
+# PQ kod kitaplarının eğitilebilmesi için yeterli sayıda vektör gerekir; altında IndexFlatL2 kalır.
+IVFPQ_MIN_VECTORS = 10_000
+IVFPQ_NLIST = 64
+IVFPQ_M = 16
+IVFPQ_NBITS = 8
+IVFPQ_NPROBE = 8
+
+
+def _build_index(vectors: np.ndarray):
+    """Vektör sayısına göre FAISS indeksini kurar ve doldurur."""
+    n, d = vectors.shape
+    if n < IVFPQ_MIN_VECTORS or d % IVFPQ_M:
+        index = faiss.IndexFlatL2(d)
+    else:
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFPQ(quantizer, d, IVFPQ_NLIST, IVFPQ_M, IVFPQ_NBITS)
+        index.train(vectors)
+    index.add(vectors)
+    _set_nprobe(index)
+    return index
+
+
+def _set_nprobe(index):
+    """IVF indekslerinde aramada taranacak küme sayısını ayarlar (düz indekste etkisizdir)."""
+    if hasattr(index, 'nprobe'):
+        index.nprobe = IVFPQ_NPROBE
+
 class KnowledgeProcessor:
     def __init__(self):
         logging.info(f"Embedding modeli '{EMBEDDING_MODEL}' yükleniyor...")
@@ -50,6 +78,7 @@ class KnowledgeProcessor:
             try:
                 logging.info("Kayıtlı AI hafızası (FAISS index ve chunks) yükleniyor...")
                 self.index = faiss.read_index(INDEX_PATH)
+                _set_nprobe(self.index)
                 with open(CHUNKS_PATH, 'rb') as f:
                     self.chunks = pickle.load(f)
                 logging.info(f"AI hafızası başarıyla yüklendi. {self.index.ntotal} vektör bulundu.")
@@ -77,9 +106,7 @@ class KnowledgeProcessor:
         embeddings = self.model.encode(self.chunks, show_progress_bar=True, batch_size=64)
         
         logging.info("FAISS vektör indeksi oluşturuluyor...")
-        d = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(d)
-        self.index.add(np.array(embeddings, dtype='float32'))
+        self.index = _build_index(np.ascontiguousarray(embeddings, dtype='float32'))
         
         try:
             faiss.write_index(self.index, INDEX_PATH)
@@ -95,6 +122,7 @@ class KnowledgeProcessor:
             return ["AI hafızası henüz oluşturulmadı."]
         
         query_embedding = self.model.encode([query])
-        distances, indices = self.index.search(np.array(query_embedding, dtype='float32'), k)
+        distances, indices = self.index.search(np.ascontiguousarray(query_embedding, dtype='float32'), k)
         
-        return [self.chunks[i] for i in indices[0] if i < len(self.chunks)]
\ No newline at end of file
+        # IVF indeksi yeterli komşu bulamazsa -1 döndürür
+        return [self.chunks[i] for i in indices[0] if 0 <= i < len(self.chunks)]
\ No newline at end of file
@@ -4,8 +4,82 @@ SmartNLPProcessor - Kural tabanlı doğal dil işleme ve niyet tahmini sınıfı
 GÜNCELLEME: Matematik sorgularını tanıma özellikleri eklendi.
 """
 import re
-from thefuzz import fuzz
-from typing import Dict, List
+from functools import lru_cache
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+from typing import Dict, Iterable, List, Optional
+
+# İsteğe bağlı: pyahocorasick ile mağaza/departman/matematik kelimeleri metinde tek geçişte aranır
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Sorgu sonuçlarının hatırlandığı en fazla farklı metin sayısı (küçük harfli metin anahtardır)
+NLP_CACHE_SIZE = 2048
+
+# Kısa sorgularda çalışan adı eşleşmesi için gereken en düşük token_set_ratio puanı
+# (thefuzz tam sayıya yuvarlayıp "> 80" kontrol ediyordu; rapidfuzz ondalıklı puan verir)
+EMPLOYEE_MATCH_CUTOFF = 80.5
+
+# Bulanık isim eşleşmesinde Türkçe harfler ASCII karşılıklarına indirgenir; "tugba saracoglu" -> "Tuğba Saraçoğlu".
+# ('İ'.lower() noktalı i bırakır: birleşik nokta U+0307 silinir)
+_TURKISH_FOLD_TABLE = str.maketrans({
+    'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u', 'â': 'a', 'î': 'i', 'û': 'u',
+    'Ç': 'c', 'Ğ': 'g', 'İ': 'i', 'Ö': 'o', 'Ş': 's', 'Ü': 'u', 'Â': 'a', 'Î': 'i', 'Û': 'u',
+    '\u0307': None,
+})
+
+def _fold_name(text: str) -> str:
+    """İsmi bulanık karşılaştırma için sadeleştirir (Türkçe harf katlama + rapidfuzz default_process)."""
+    return default_process(text.translate(_TURKISH_FOLD_TABLE))
+
+# Sorgu başına kullanılan sabit regex'ler modül yüklenirken bir kez derlenir
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+_MATH_PATTERNS_RE = re.compile('|'.join((
+    r'\d+\s*[+\-*/]\s*\d+',  # 5 + 3, 100 * 12 gibi
+    r'kaç eder',
+    r'hesapla',
+    r'ortalama.*(?:maaş|ciro|satış)',
+    r'toplam.*(?:çalışan|mağaza)',
+    r'yüzde.*(?:kaç|artış|büyüme)'
+)))
+
+def _keyword_re(keywords) -> re.Pattern:
+    """Anahtar kelimelerden herhangi birini alt dize olarak arayan regex"""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+def _build_automaton(words: Iterable[str]) -> Optional['ahocorasick.Automaton']:
+    """Kelimelerin her biri kendisini değer olarak döndüren Aho-Corasick otomatı; kütüphane ya da kelime yoksa None"""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    if automaton.kind == ahocorasick.EMPTY:
+        return None
+    automaton.make_automaton()
+    return automaton
+
+_EMPLOYEE_COUNT_RE = _keyword_re(['toplam çalışan', 'kaç çalışan', 'çalışan sayısı'])
+_SALARY_WORD_RE = _keyword_re(['maaş', 'salary'])
+_WEB_SEARCH_WORDS = frozenset(['internet', 'google', 'hava', 'dolar'])
+
+# Matematik bağlamı: veri sütunu -> anahtar kelimeler; hesaplama tipi -> anahtar kelimeler (sıra önceliktir)
+_DATA_COLUMN_RES = (
+    ('maaş', _keyword_re(['maaş', 'salary', 'ücret'])),
+    ('ciro', _keyword_re(['ciro', 'satış', 'sales', 'revenue'])),
+    ('çalışan', _keyword_re(['çalışan', 'employee', 'personel'])),
+)
+_CALCULATION_TYPE_RES = (
+    ('average', _keyword_re(['ortalama', 'average', 'mean'])),
+    ('sum', _keyword_re(['toplam', 'sum', 'total'])),
+    ('max', _keyword_re(['maksimum', 'max', 'en yüksek'])),
+    ('min', _keyword_re(['minimum', 'min', 'en düşük'])),
+    ('percentage', _keyword_re(['yüzde', 'percent', 'oran'])),
+)
 
 class SmartNLPProcessor:
     def __init__(self):
@@ -55,6 +129,8 @@ class SmartNLPProcessor:
         
         self.store_names: Dict[str, str] = {}
         self.employee_names: Dict[str, str] = {}
+        self._employee_keys: List[str] = []
+        self._employee_folded: List[str] = []
         self.department_names: List[str] = ['bilgi işlem', 'muhasebe', 'yönetim', 'ürün yönetimi', 'insan kaynakları', 'web']
 
         # YENİ EKLENEN - Matematik anahtar kelimeleri
@@ -66,87 +142,131 @@ class SmartNLPProcessor:
             'percentage': ['yüzde', 'percent', '%', 'oran', 'rate', 'artış', 'büyüme', 'azalış', 'değişim'],
             'comparison': ['karşılaştır', 'compare', 'fark', 'difference', 'hangi daha', 'en iyi', 'en kötü']
         }
+        
+        # Sorgu başına tekrar taranmamaları için yukarıdaki tablolardan türetilen arama yapıları
+        # Eş anlamlı kelime -> ana kelime(ler)
+        self._synonym_keys: Dict[str, List[str]] = {}
+        for key, values in self.synonyms.items():
+            for value in values:
+                self._synonym_keys.setdefault(value, []).append(key)
+        # (niyet, kelime kümesi, puan) - kümenin tüm kelimeleri sorguda varsa niyet puan alır
+        self._intent_pattern_sets = [
+            (intent, frozenset(pattern), len(pattern) * 2)
+            for intent, patterns in self.intent_patterns.items() for pattern in patterns
+        ]
+        self._math_keyword_res = {op: _keyword_re(keywords) for op, keywords in self.math_keywords.items()}
+        self._math_keyword_sets = {op: frozenset(keywords) for op, keywords in self.math_keywords.items()}
+        # Aho-Corasick otomatları (kütüphane yoksa None; eski tek tek alt dize aramasına düşülür)
+        self._math_automaton = _build_automaton({kw for keywords in self.math_keywords.values() for kw in keywords})
+        self._department_automaton = _build_automaton(self.department_names)
+        self._store_automaton = None
+        self._store_order: Dict[str, int] = {}
+        
+        # Sonuçlar yalnızca metne ve isim listelerine bağlı; isimler değişince önbellekler temizlenir
+        self._predict_intent_cached = lru_cache(maxsize=NLP_CACHE_SIZE)(self._predict_intent)
+        self._is_math_query_cached = lru_cache(maxsize=NLP_CACHE_SIZE)(self._is_math_query)
+        self._math_context_cached = lru_cache(maxsize=NLP_CACHE_SIZE)(self._extract_math_context)
+
+    def _clear_caches(self):
+        self._predict_intent_cached.cache_clear()
+        self._is_math_query_cached.cache_clear()
+        self._math_context_cached.cache_clear()
 
     def add_store_names(self, store_names: List[str]):
         for name in store_names:
             if name and isinstance(name, str): self.store_names[name.lower()] = name
+        # Sonuçlar mağazaların ekleniş sırasıyla döndürülür (tek tek aramadaki sırayla aynı)
+        self._store_order = {store_lower: i for i, store_lower in enumerate(self.store_names)}
+        self._store_automaton = _build_automaton(self.store_names)
+        self._clear_caches()
 
     def add_employee_names(self, employee_names: List[str]):
         for name in employee_names:
             if name and isinstance(name, str): self.employee_names[name.lower()] = name
+        self._employee_keys = list(self.employee_names)
+        # İsimler bir kez katlanır; sorgu başına yalnızca sorgu metni işlenir
+        self._employee_folded = [_fold_name(name) for name in self._employee_keys]
+        self._clear_caches()
 
-    def _normalize_text(self, text: str) -> List[str]:
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', '', text)
-        return text.split()
+    def _normalize_text(self, text_lower: str) -> List[str]:
+        return _NON_WORD_RE.sub('', text_lower).split()
 
-    def _find_entities(self, text: str) -> Dict:
+    def _match_math_operations(self, text_lower: str) -> List[str]:
+        """Metinde anahtar kelimesi geçen matematik operasyon türleri (math_keywords sırasıyla)"""
+        if self._math_automaton is not None:
+            found = {keyword for _, keyword in self._math_automaton.iter(text_lower)}
+            return [op for op, keywords in self._math_keyword_sets.items() if not keywords.isdisjoint(found)]
+        return [op for op, keyword_re in self._math_keyword_res.items() if keyword_re.search(text_lower)]
+
+    def _find_entities(self, text: str, text_lower: str = None) -> Dict:
         entities = {'stores': [], 'employees': [], 'departments': [], 'numbers': [], 'math_operations': []}
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
         
         # Mağaza isimleri
-        for store_lower, store_original in self.store_names.items():
-            if store_lower in text_lower:
-                entities['stores'].append(store_original)
+        if self._store_automaton is not None:
+            found = {store_lower for _, store_lower in self._store_automaton.iter(text_lower)}
+            entities['stores'] = [self.store_names[store_lower] for store_lower in sorted(found, key=self._store_order.get)]
+        else:
+            for store_lower, store_original in self.store_names.items():
+                if store_lower in text_lower:
+                    entities['stores'].append(store_original)
         
         # YENİ EKLENEN - Sayıları çıkar
-        number_pattern = r'\d+\.?\d*'
-        numbers = [float(match) for match in re.findall(number_pattern, text)]
-        entities['numbers'] = numbers
+        entities['numbers'] = [float(match) for match in _NUMBER_RE.findall(text)]
         
         # YENİ EKLENEN - Matematik operasyonlarını tespit et
-        for operation_type, keywords in self.math_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    entities['math_operations'].append(operation_type)
-                    break
+        entities['math_operations'] = self._match_math_operations(text_lower)
         
         # Çalışan isimleri (iyileştirildi)
-        if len(text_lower.split()) < 4: # Kısa sorgularda isim arama
-            best_match_score = 0
-            best_match_name = None
-            for emp_lower, emp_original in self.employee_names.items():
-                score = fuzz.token_set_ratio(text_lower, emp_lower)
-                if score > best_match_score:
-                    best_match_score = score
-                    best_match_name = emp_original
-            
-            if best_match_score > 80: # Yüksek bir eşik belirle
-                entities['employees'].append(best_match_name)
+        if len(text_lower.split()) < 4 and self._employee_keys: # Kısa sorgularda isim arama
+            # En iyi eşleşme tüm isim listesi üzerinde rapidfuzz'un yerel döngüsünde bulunur
+            # Her iki taraf da Türkçe harfleri katlanmış haliyle karşılaştırılır (ASCII yazılmış isimler de bulunur)
+            match = process.extractOne(_fold_name(text_lower), self._employee_folded, scorer=fuzz.token_set_ratio,
+                                       processor=None, score_cutoff=EMPLOYEE_MATCH_CUTOFF)
+            if match:
+                entities['employees'].append(self.employee_names[self._employee_keys[match[2]]])
 
         # Departmanlar
-        for dept_name in self.department_names:
-            if dept_name in text_lower:
-                entities['departments'].append(dept_name.title())
+        if self._department_automaton is not None:
+            found = {dept_name for _, dept_name in self._department_automaton.iter(text_lower)}
+            entities['departments'] = [dept_name.title() for dept_name in self.department_names if dept_name in found]
+        else:
+            for dept_name in self.department_names:
+                if dept_name in text_lower:
+                    entities['departments'].append(dept_name.title())
                 
         return entities
 
     def predict_intent(self, text: str, data_insights: Dict) -> Dict:
-        words = self._normalize_text(text)
+        # Aynı sorgu (büyük/küçük harf farkı gözetmeden) tekrar geldiğinde puanlama ve bulanık isim araması atlanır.
+        # Önbellekteki sonuç paylaşıldığı için çağırana listelerin kopyası verilir.
+        result = self._predict_intent_cached(text.lower())
+        return {'intent': result['intent'], 'entities': {key: list(values) for key, values in result['entities'].items()}}
+
+    def _predict_intent(self, text_lower: str) -> Dict:
+        # Metin bir kez küçük harfe çevrilmiş olarak gelir, tüm kontroller bunu kullanır
+        words = self._normalize_text(text_lower)
         expanded_words = set(words)
         for word in words:
-            for key, values in self.synonyms.items():
-                if word in values:
-                    expanded_words.add(key)
+            expanded_words.update(self._synonym_keys.get(word, ()))
         
         scores = {intent: 0 for intent in self.intent_patterns}
         
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if all(p in expanded_words for p in pattern):
-                    scores[intent] += len(pattern) * 2
+        for intent, pattern, weight in self._intent_pattern_sets:
+            if pattern <= expanded_words:
+                scores[intent] += weight
 
-        entities = self._find_entities(text)
+        entities = self._find_entities(text_lower, text_lower)
         
         # YENİ EKLENEN - Özel durum kontrolü
-        text_lower = text.lower()
         
         # "Toplam çalışan sayısı" sorgularını matematik olarak işaretle
-        if any(phrase in text_lower for phrase in ['toplam çalışan', 'kaç çalışan', 'çalışan sayısı']):
+        if _EMPLOYEE_COUNT_RE.search(text_lower):
             scores['data_statistics'] = scores.get('data_statistics', 0) + 20
         
         # "En yüksek maaşlı" vs "en düşük maaşlı" karşılaştırma sorgularını işaretle
-        if 'kat' in text_lower and ('maaş' in text_lower or 'salary' in text_lower):
+        if 'kat' in text_lower and _SALARY_WORD_RE.search(text_lower):
             scores['mathematical_calculation'] = scores.get('mathematical_calculation', 0) + 25
         
         # YENİ EKLENEN - Matematik sorguları için özel puanlama
@@ -170,7 +290,7 @@ class SmartNLPProcessor:
         best_intent = max(scores, key=scores.get) if any(s > 0 for s in scores.values()) else 'unknown'
         
         if best_intent == 'unknown':
-            if any(w in expanded_words for w in ['internet', 'google', 'hava', 'dolar']):
+            if not _WEB_SEARCH_WORDS.isdisjoint(expanded_words):
                 best_intent = 'web_search'
             else:
                 best_intent = 'summarize_context'
@@ -187,28 +307,15 @@ class SmartNLPProcessor:
         Returns:
             bool: Matematik sorgusu ise True
         """
-        entities = self._find_entities(text)
-        
-        # Sayı + matematik operasyonu kombinasyonu
-        if entities['numbers'] and entities['math_operations']:
+        return self._is_math_query_cached(text.lower())
+
+    def _is_math_query(self, text_lower: str) -> bool:
+        # Sayı + matematik operasyonu kombinasyonu (varlık çıkarımının tamamına gerek yok)
+        if _NUMBER_RE.search(text_lower) and self._match_math_operations(text_lower):
             return True
             
-        # Belirli matematik pattern'ları
-        math_patterns = [
-            r'\d+\s*[+\-*/]\s*\d+',  # 5 + 3, 100 * 12 gibi
-            r'kaç eder',
-            r'hesapla',
-            r'ortalama.*(?:maaş|ciro|satış)',
-            r'toplam.*(?:çalışan|mağaza)',
-            r'yüzde.*(?:kaç|artış|büyüme)'
-        ]
-        
-        text_lower = text.lower()
-        for pattern in math_patterns:
-            if re.search(pattern, text_lower):
-                return True
-                
-        return False
+        # Belirli matematik pattern'ları (tek birleşik regex)
+        return bool(_MATH_PATTERNS_RE.search(text_lower))
 
     def extract_math_context(self, text: str) -> Dict:
         """
@@ -220,7 +327,12 @@ class SmartNLPProcessor:
         Returns:
             Dict: Çıkarılan bağlamsal bilgiler
         """
-        entities = self._find_entities(text)
+        context = self._math_context_cached(text.lower())
+        return {**context, 'numbers': list(context['numbers']), 'operations': list(context['operations']),
+                'data_columns': list(context['data_columns'])}
+
+    def _extract_math_context(self, text_lower: str) -> Dict:
+        entities = self._find_entities(text_lower, text_lower)
         
         context = {
             'numbers': entities['numbers'],
@@ -229,26 +341,34 @@ class SmartNLPProcessor:
             'calculation_type': None
         }
         
-        text_lower = text.lower()
-        
         # Veri sütunlarını belirle
-        if any(word in text_lower for word in ['maaş', 'salary', 'ücret']):
-            context['data_columns'].append('maaş')
-        if any(word in text_lower for word in ['ciro', 'satış', 'sales', 'revenue']):
-            context['data_columns'].append('ciro')
-        if any(word in text_lower for word in ['çalışan', 'employee', 'personel']):
-            context['data_columns'].append('çalışan')
+        context['data_columns'] = [column for column, keyword_re in _DATA_COLUMN_RES if keyword_re.search(text_lower)]
             
-        # Hesaplama tipini belirle
-        if any(word in text_lower for word in ['ortalama', 'average', 'mean']):
-            context['calculation_type'] = 'average'
-        elif any(word in text_lower for word in ['toplam', 'sum', 'total']):
-            context['calculation_type'] = 'sum'
-        elif any(word in text_lower for word in ['maksimum', 'max', 'en yüksek']):
-            context['calculation_type'] = 'max'
-        elif any(word in text_lower for word in ['minimum', 'min', 'en düşük']):
-            context['calculation_type'] = 'min'
-        elif any(word in text_lower for word in ['yüzde', 'percent', 'oran']):
-            context['calculation_type'] = 'percentage'
+        # Hesaplama tipini belirle (ilk eşleşen tip)
+        context['calculation_type'] = next(
+            (calc_type for calc_type, keyword_re in _CALCULATION_TYPE_RES if keyword_re.search(text_lower)), None)
             
-        return context
\ No newline at end of file
+        return context
+
+# Test ve kullanım örneği
+def test_employee_name_matching():
+    """ASCII yazılmış Türkçe isimlerin doğru çalışana eşlendiğini kontrol eder"""
+    nlp = SmartNLPProcessor()
+    nlp.add_employee_names(["Efe Barçın", "Tuğba Saraçoğlu", "Erdinç Cengiz", "Tugce Tek"])
+    
+    cases = {
+        "efe barcin": "Efe Barçın",
+        "tugba saracoglu": "Tuğba Saraçoğlu",
+        "ERDİNÇ CENGİZ": "Erdinç Cengiz",
+        "tuğçe tek": "Tugce Tek",
+    }
+    for query, expected in cases.items():
+        employees = nlp._find_entities(query)['employees']
+        assert employees == [expected], f"{query!r}: {employees}"
+        print(f"✅ {query} -> {expected}")
+    
+    assert nlp._find_entities("merhaba")['employees'] == []
+
+
+if __name__ == "__main__":
+    test_employee_name_matching()